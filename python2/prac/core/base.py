@@ -22,6 +22,7 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 # add 3rd party components to pythonpath, if necessary
 import fnmatch
+import glob
 import os
 import sys
 from ConfigParser import ConfigParser
@@ -29,21 +30,23 @@ from string import whitespace, strip
 
 import yaml
 from dnutils import ifnone, logs
-from pymongo.mongo_client import MongoClient
 
 import locations
 import nltk
 from prac import locations as praclocations
 from prac.core.inference import PRACInferenceStep, PRACInference
-from prac.core.wordnet import WordNet, VERB_TAGS
+from prac.core.snapshot import PRACSnapshot, source_fingerprint
+from prac.core.wordnet import WordNet, VERB_TAGS, simcache
 from prac.db.ies.models import constants
 from prac.db.ies.models import Word
 from pracmln import Database, MLN
 from pracmln import MLNQuery
 from pracmln.mln import NoSuchPredicateError
 from collections import defaultdict
+from pracmln.mln.base import parse_mln
 from pracmln.mln.util import mergedom
-from prac.db.ies.extraction import HowtoImport
+from pracmln.utils.project import MLNProject
+from prac.pracutils.utils import LRUCache
 
 
 nltk.data.path = [praclocations.nltk_data]
@@ -66,13 +69,31 @@ class PRACConfig(ConfigParser):
             'user': '',
             'password': ''
         },
+        'nl_parsing': {
+            'cache': 'true',
+            'cachesize': '10000'
+        },
         'wordnet': {
+            'simcachesize': '100000',
             'concepts': '''water.n.06
                          cup.n.01
                          cup.n.02
                          bowl.n.01
                          bowl.n.02
                          milk.n.01'''
+        },
+        'database': {
+            'atomcachesize': '200000'
+        },
+        'mln': {
+            'cachesize': '256',
+            'preload': 'false'
+        },
+        'snapshot': {
+            'enabled': 'true'
+        },
+        'visualization': {
+            'pngs': 'false'
         }
     }
 
@@ -107,14 +128,47 @@ class PRAC(object):
     The PRAC reasoning system.
     '''
     def __init__(self, configfile='pracconf'):
-        # read all the manifest files.
         sys.path.insert(0, locations.code_base)
         self.config = PRACConfig(configfile)
-        self.actioncores = ActionCore.load(os.path.join(praclocations.models, 'actioncores.yaml'))
-        self._manifests = []
-        self._manifests_by_name = {}
         self.logger = praclogger
         self._verbose = 1
+        self._module_by_name = {}
+        self._modules = []
+        self._syntaxpreds = None
+        self._mongodb = None
+        self.render_pngs = self.config.getboolean('visualization', 'pngs')
+        simcache.maxsize = self.config.getint('wordnet', 'simcachesize')
+        atomcache.maxsize = self.config.getint('database', 'atomcachesize')
+        mlncache.maxsize = self.config.getint('mln', 'cachesize')
+        usesnapshot = self.config.getboolean('snapshot', 'enabled')
+        fingerprint = source_fingerprint() if usesnapshot else None
+        snapshot = PRACSnapshot.load(fingerprint=fingerprint) if usesnapshot else None
+        if snapshot is not None:
+            snapshot.restore(self)
+            self.logger.debug('Restored PRAC from snapshot.')
+        else:
+            # TODO: replace this by real action core definitions
+            self.actioncores = ActionCore.load(os.path.join(praclocations.models, 'actioncores.yaml'))
+            self.read_manifests()
+            self.mln = self.construct_global_mln()
+            if self.config.getboolean('mln', 'preload'):
+                self.preload_projects()
+        for manifest in self._manifests:
+            sys.path.insert(0, os.path.abspath(os.path.join(manifest.module_path, 'src')))
+        self.wordnet = WordNet()
+        if usesnapshot and snapshot is None:
+            try:
+                PRACSnapshot.capture(self, fingerprint).save()
+            except Exception as e:
+                self.logger.warning('Could not store PRAC snapshot: {}'.format(e))
+
+
+    def read_manifests(self):
+        '''
+        Reads the manifest files of all modules.
+        '''
+        self._manifests = []
+        self._manifests_by_name = {}
         for module_path in os.listdir(praclocations.pracmodules):
             if not os.path.isdir(os.path.join(praclocations.pracmodules, module_path)):
                 continue
@@ -123,20 +177,11 @@ class PRAC(object):
                 self.logger.warning('No module manifest file in path "{}".'.format(module_path))
                 continue
             manifest_file = open(manifest_file_name, 'r')
-            modulessrc = os.path.abspath(os.path.join(praclocations.pracmodules, module_path, 'src'))
-            sys.path.insert(0, modulessrc)
             module = PRACModuleManifest.read(manifest_file)
             module.module_path = os.path.join(praclocations.pracmodules, module_path)
             self._manifests.append(module)
             self._manifests_by_name[module.name] = module
             self.logger.debug('Read manifest file for module "{}".'.format(module.name))
-        self._module_by_name = {}
-        self._modules = []
-        # TODO: replace this by real action core definitions
-        self.wordnet = WordNet()
-        self.mln = self.construct_global_mln()
-        self.mongodb =  MongoClient(host=self.config.get('mongodb', 'host'),
-                                    port=self.config.getint('mongodb', 'port'))
 
 
     def construct_global_mln(self):
@@ -159,8 +204,25 @@ class PRAC(object):
         return self._manifests_by_name.get(modulename, None)
 
 
+    def preload_projects(self):
+        '''
+        Loads all MLN projects of all modules and parses their MLNs into the
+        process-wide ``mlncache``, such that the first inference does not
+        have to. MLNs whose query configuration does not specify a logic
+        are parsed with ``FirstOrderLogic``.
+        '''
+        for manifest in self._manifests:
+            for projectpath in sorted(glob.glob(os.path.join(manifest.module_path, '*.pracmln'))):
+                try:
+                    project = open_project(projectpath)
+                    project_mln(project, projectpath, [manifest.module_path])
+                except Exception as e:
+                    self.logger.warning('could not preload project {}: {}'.format(projectpath, e))
+
+
     def set_known_concepts(self, concepts):
         self.wordnet = WordNet(concepts)
+        self.wordnet.clear_caches()
 
 
     def module(self, modulename):
@@ -212,6 +274,30 @@ class PRAC(object):
         return set([r for a in self.actioncores.values() for r in a.roles])
 
 
+    @property
+    def mongodb(self):
+        '''
+        The client of the PRAC MongoDB, which is connected on first use.
+        '''
+        if self._mongodb is None:
+            from pymongo.mongo_client import MongoClient
+            self._mongodb = MongoClient(host=self.config.get('mongodb', 'host'),
+                                        port=self.config.getint('mongodb', 'port'))
+        return self._mongodb
+
+
+    @property
+    def syntax_predicates(self):
+        '''
+        The names of the syntactic predicates, i.e. the ones of the parsing
+        module and ``has_pos``.
+        '''
+        if self._syntaxpreds is None:
+            preds = [p.name for p in self.module('nl_parsing').mln.predicates] + ['has_pos']
+            self._syntaxpreds = frozenset(preds)
+        return self._syntaxpreds
+
+
     @property
     def verbose(self):
         return self._verbose
@@ -236,6 +322,7 @@ class PRAC(object):
                          the high-level goal, e.g. ['flip the pancake around.',
                          'wait for 2 minutes.', ...]
         '''
+        from prac.db.ies.extraction import HowtoImport
         fe = HowtoImport(self, {howto: steps}, save=save)
         fe.run()
         
@@ -475,6 +562,27 @@ class PRACModule(object):
         pass
 
 
+    def load_project(self, projectpath):
+        '''
+        Returns the MLN project stored in ``projectpath`` (see
+        ``open_project()``).
+        '''
+        return open_project(projectpath)
+
+
+    def project_mln(self, project, projectpath, logic='FirstOrderLogic', grammar='PRACGrammar'):
+        '''
+        Returns the MLN of the query configuration of ``project``, whose
+        includes are searched in the module path (see ``project_mln()``).
+
+        :param logic:       the logic used if the query configuration does
+                            not specify one
+        :param grammar:     the grammar used if the query configuration does
+                            not specify one
+        '''
+        return project_mln(project, projectpath, [self.module_path], logic, grammar)
+
+
     def mlnquery(self, config=None, verbose=None, **params):
         '''
         Wrapper for MLNQuery to replace the resultdb of the inference object
@@ -573,13 +681,158 @@ class PRACModule(object):
         pass
 
 
+# MLN projects and parsed MLNs, shared by all modules
+mlncache = LRUCache(maxsize=256)
+
+
+def open_project(projectpath):
+    '''
+    Returns the MLN project stored in the ``.pracmln`` file ``projectpath``.
+
+    Projects are kept in the process-wide ``mlncache`` under their path and
+    modification time, such that every file is read only once, unless it
+    changes.
+    '''
+    path = os.path.abspath(projectpath)
+    key = ('project', path, os.path.getmtime(path))
+    project = mlncache.get(key)
+    if project is None:
+        project = MLNProject.open(path)
+        mlncache.put(key, project)
+    return project
+
+
+def project_mln(project, projectpath, searchpaths, logic='FirstOrderLogic', grammar='PRACGrammar'):
+    '''
+    Returns the parsed MLN of the query configuration of ``project``.
+
+    MLNs are kept in the process-wide ``mlncache`` under their text, the
+    path and modification time of the project file, the search paths and
+    their logic and grammar. The cached MLNs are shared by all modules and
+    must not be modified.
+
+    :param project:     the ``MLNProject``
+    :param projectpath: the path of the project file
+    :param searchpaths: the directories searched for included files
+    :param logic:       the logic used if the query configuration does not
+                        specify one
+    :param grammar:     the grammar used if the query configuration does not
+                        specify one
+    '''
+    mlntext = project.mlns.get(project.queryconf['mln'], None)
+    logic = project.queryconf.get('logic', logic)
+    grammar = project.queryconf.get('grammar', grammar)
+    mtime = os.path.getmtime(projectpath) if os.path.isfile(projectpath) else None
+    key = ('mln', mlntext, projectpath, mtime, tuple(searchpaths), logic, grammar)
+    mln = mlncache.get(key)
+    if mln is None:
+        mln = parse_mln(mlntext, searchpaths=searchpaths, projectpath=projectpath,
+                        logic=logic, grammar=grammar)
+        mlncache.put(key, mln)
+    return mln
+
+
+# parsed ground literals, shared by all databases and modules
+atomcache = LRUCache(maxsize=200000)
+
+
+def parse_literal(literal, logic=None):
+    '''
+    Returns the sign, the predicate name and the arguments of the ground
+    literal string ``literal``, like ``logic.parse_literal()`` but with the
+    arguments as a tuple.
+
+    The results are stored in the process-wide ``atomcache`` with all
+    strings interned, such that every literal is parsed only once and the
+    names and constants of all parsed literals share their memory.
+    Literals of the simple form ``pred(a,b)`` are split without invoking the
+    formula parser of ``logic``.
+
+    :param literal:     the literal string, e.g. ``!has_pos(pancake-3,NN)``
+    :param logic:       the logic of an MLN, used for literals that are not
+                        of the simple form.
+    '''
+    lit = atomcache.get(literal)
+    if lit is None:
+        lit = _split_literal(literal)
+        if lit is None:
+            lit = logic.parse_literal(literal)
+        true, predname, args = lit
+        lit = true, _intern(predname), tuple(_intern(a) for a in args)
+        atomcache.put(literal, lit)
+    return lit
+
+
+def _intern(s):
+    return intern(s) if type(s) is str else s
+
+
+def _split_literal(literal):
+    '''
+    Splits a ground literal string like ``!has_pos(pancake-3,NN)`` into its
+    sign, its predicate name and the tuple of its arguments without invoking
+    the formula parser of the logic.
+
+    :return:    a tuple ``(true, predname, args)``, or ``None`` if the literal
+                contains quoted constants or nested parentheses.
+    '''
+    literal = literal.strip()
+    if '"' in literal or literal.count('(') != 1 or not literal.endswith(')'):
+        return None
+    true = not literal.startswith('!')
+    predname, _, args = literal.lstrip('!').partition('(')
+    return true, predname.strip(), tuple(a.strip() for a in args[:-1].split(','))
+
+
+class EvidenceIndex(object):
+    '''
+    An index of the evidence of a database by predicate names, and by
+    predicate names and first arguments, which maps the argument tuples of
+    the ground atoms to their truth values.
+
+    The atoms of a predicate are kept in the order of the evidence.
+    '''
+
+    def __init__(self):
+        self.preds = defaultdict(dict)
+        self.firstargs = defaultdict(dict)
+
+
+    def add(self, predname, args, truth):
+        self.preds[predname][args] = truth
+        self.firstargs[(predname, args[0])][args] = truth
+
+
+    def remove(self, predname, args):
+        self.preds[predname].pop(args, None)
+        self.firstargs[(predname, args[0])].pop(args, None)
+
+
+    def atoms(self, predname, first=None):
+        '''
+        Returns a dictionary mapping the argument tuples of all atoms of the
+        predicate ``predname`` (with first argument ``first``, if given) to
+        their truth values.
+        '''
+        if first is None:
+            return self.preds.get(predname, {})
+        return self.firstargs.get((predname, first), {})
+
+
 class PRACDatabase(Database):
     '''
     Represents a subclass of the MLN Database and extends it by frequently used
     convenience query methods.
+
+    Copies and unions of PRACDatabases are copy-on-write: they share the
+    evidence of the databases they are derived from, which is only duplicated
+    when one of the databases sharing it is modified.
     '''
     def __init__(self, prac, evidence=None, db=None, ignore_unknown_preds=False):
         self.prac = prac
+        self._index = None
+        # whether the evidence dict may be referenced by other databases
+        self._shared = False
 
         if evidence: pass
         elif db:
@@ -598,25 +851,183 @@ class PRACDatabase(Database):
                         with `mln`, if not, it will be associated with
                         `self.mln`.
         '''
-        return PRACDatabase(self.prac, evidence=self.evidence)
+        db = PRACDatabase(self.prac)
+        db._merge(self)
+        return db
+
+
+    def _merge(self, db):
+        '''
+        Adds all atoms of the PRACDatabase ``db`` to this database without
+        parsing them again. If this database is empty, it shares the evidence
+        of ``db`` until one of them is modified.
+        '''
+        if not db._evidence:
+            pass
+        elif not self._evidence:
+            self._evidence = db._evidence
+            self._index = db._index
+            self._shared = db._shared = True
+        else:
+            self._unshare()
+            self._evidence.update(db._evidence)
+            self._index = None
+        for domain, values in db.domains.items():
+            mine = self.domains[domain]
+            known = set(mine)
+            mine.extend(v for v in values if v not in known)
+
+
+    def _unshare(self):
+        '''
+        Gives this database its own copy of the evidence, if it is shared
+        with other databases. Must be called before any modification.
+        '''
+        if self._shared:
+            self._evidence = dict(self._evidence)
+            self._index = None
+            self._shared = False
+
+
+    def evidence_index(self):
+        '''
+        Returns the ``EvidenceIndex`` of this database, which is used by the
+        convenience queries instead of the query engine of pracmln.
+
+        It is built on first use and updated incrementally by ``add()`` (and
+        ``<<``) and ``rmval()``.
+        '''
+        if self._index is None:
+            index = EvidenceIndex()
+            for atom, truth in self.evidence.iteritems():
+                _, predname, args = parse_literal(atom, self.mln.logic)
+                index.add(predname, args, truth)
+            self._index = index
+        return self._index
+
+
+    def add(self, gndlit, truth=1):
+        self._unshare()
+        Database.add(self, gndlit, truth)
+        if self._index is None:
+            return self
+        if isinstance(gndlit, basestring):
+            true, predname, args = parse_literal(gndlit, self.mln.logic)
+        else:
+            # unknown representation, rebuild the index on its next use
+            self._index = None
+            return self
+        truth = float('%.6f' % (truth if true else 1 - truth))
+        self._index.add(predname, args, truth)
+        return self
+
+
+    def add_atom(self, predname, args, truth=1):
+        '''
+        Adds the ground atom of the predicate ``predname`` with the arguments
+        ``args`` to the evidence, its domains and the evidence index without
+        formatting and parsing an atom string.
+
+        :param predname:    the name of the predicate
+        :param args:        the sequence of arguments of the atom
+        :param truth:       the truth value of the atom
+        '''
+        pred = self.mln.predicate(predname)
+        if pred is None:
+            raise NoSuchPredicateError('Predicate %s is undefined.' % predname)
+        self._unshare()
+        args = tuple(args)
+        for domname, value in zip(pred.argdoms, args):
+            dom = self.domains[domname]
+            if value not in dom:
+                dom.append(value)
+        truth = float('%.6f' % truth)
+        self._evidence['%s(%s)' % (predname, ','.join(args))] = truth
+        if self._index is not None:
+            self._index.add(predname, args, truth)
+        return self
+
+
+    def rmval(self, domain, value):
+        self._unshare()
+        Database.rmval(self, domain, value)
+        if self._index is None:
+            return
+        for predname, atoms in list(self._index.preds.items()):
+            positions = [i for i, dom in enumerate(self.mln.predicate(predname).argdoms) if dom == domain]
+            if not positions:
+                continue
+            for args in [a for a in atoms if any(a[i] == value for i in positions)]:
+                self._index.remove(predname, args)
+
+
+    def retract(self, gndatom):
+        self._unshare()
+        Database.retract(self, gndatom)
+        self._index = None
+
+
+    def retractall(self, predname):
+        self._unshare()
+        Database.retractall(self, predname)
+        self._index = None
+
+
+    def _true(self, predname, first=None):
+        '''
+        Returns the argument tuples of all true atoms of the predicate
+        ``predname`` (with first argument ``first``, if given) in the order in
+        which the query engine yields them, i.e. in the order of the values
+        in the domains of the arguments, which the query engine merges from
+        the domains of the MLN and the database.
+        '''
+        atoms = [args for args, truth in self.evidence_index().atoms(predname, first).items() if truth >= 1]
+        if len(atoms) > 1:
+            pred = self.mln.predicate(predname)
+            domains = mergedom(*[{dom: doms[dom] for dom in pred.argdoms if dom in doms}
+                                 for doms in (self.mln.domains, self.domains)])
+            ranks = [None if first is not None and i == 0 else {v: j for j, v in enumerate(domains.get(dom, []))}
+                     for i, dom in enumerate(pred.argdoms)]
+            atoms.sort(key=lambda args: tuple(r.get(a, -1) for r, a in zip(ranks, args) if r is not None))
+        return atoms
+
+
+    def add_all(self, atoms):
+        '''
+        Adds multiple ground atoms to the database at once.
+
+        :param atoms:   an iterable of ground atoms, given as strings or as
+                        (atom, truth) tuples.
+        '''
+        for atom in atoms:
+            if isinstance(atom, tuple):
+                self.add(*atom)
+            else:
+                self.add(atom)
 
 
     def union(self, dbs, mln=None):
         '''
         Returns a new PRACDatabase consisting of the union of all databases
-        given in the arguments.
+        given in the arguments. The atoms of later databases (and finally of
+        this one) take precedence.
+
+        PRACDatabases are merged without re-adding their atoms, and the union
+        shares the evidence of the first of them until it is modified. Atoms
+        of other databases, whose predicates are unknown to PRAC, are skipped.
         '''
         db_ = PRACDatabase(self.prac)
-        if type(dbs) is list:
-            dbs = [e for d in dbs for e in list(d)] + list(self)
         if isinstance(dbs, Database):
-            dbs = list(dbs) + list(self)
-
-        for atom, truth in dbs:
-            try:
-                db_ << (atom, truth)
-            except NoSuchPredicateError:
-                pass
+            dbs = [dbs]
+        for db in list(dbs) + [self]:
+            if isinstance(db, PRACDatabase) and db.mln is db_.mln:
+                db_._merge(db)
+                continue
+            for atom, truth in db:
+                try:
+                    db_ << (atom, truth)
+                except NoSuchPredicateError:
+                    pass
         return db_
 
 
@@ -624,8 +1035,8 @@ class PRACDatabase(Database):
         '''
         :return: a generator yielding (word, action core) pairs.
         '''
-        for q in self.query('action_core(?w,?ac)'):
-            yield q['?w'], q['?ac']
+        for w, ac in self._true('action_core'):
+            yield w, ac
 
 
     def achieved_by(self, actioncore='?ac1'):
@@ -647,8 +1058,10 @@ class PRACDatabase(Database):
         '''
         roles = self.prac.actioncores[actioncore].roles
         for role in roles:
-            for q in self.query('{}(?w,{}) ^ has_sense(?w,?s)'.format(role, actioncore)):
-                yield role, q['?s']
+            for w, ac in self._true(role):
+                if ac != actioncore: continue
+                for _, s in self._true('has_sense', w):
+                    yield role, s
 
 
     def rolesw(self, actioncore):
@@ -657,8 +1070,9 @@ class PRACDatabase(Database):
         :return:              a generator yielding (role, word) pairs 
         '''
         for role in self.prac.actioncores[actioncore].roles:
-            for q in self.query('{}(?w,{})'.format(role, actioncore)):
-                yield role, q['?w']
+            for w, ac in self._true(role):
+                if ac == actioncore:
+                    yield role, w
 
 
     def properties(self, word):
@@ -677,8 +1091,8 @@ class PRACDatabase(Database):
 
         :return:    a generator yielding word -> postag tuples
         '''
-        for q in self.query('has_pos(?w, ?p)'):
-            yield q['?w'], q['?p']
+        for w, p in self._true('has_pos'):
+            yield w, p
 
 
     def postag(self, word=None, pos=None):
@@ -689,11 +1103,11 @@ class PRACDatabase(Database):
         '''
         if (word, pos) == (None, None):
             raise ValueError('Either word or pos must be given')
-        w = ifnone(word, '?w')
-        p = ifnone(pos, '?p')
-        for q in self.query('has_pos({}, {})'.format(w, p)):
-            if '?w' in q: yield q['?w']
-            if '?p' in q: yield q['?p']
+        if word is not None and pos is not None:
+            return
+        for w, p in self._true('has_pos', word):
+            if word is not None: yield p
+            elif p == pos: yield w
 
 
     def is_aux_verb(self, word):
@@ -703,9 +1117,9 @@ class PRACDatabase(Database):
         :return:    (bool)
         '''
 
-        for _ in self.query('aux(?w, {})'.format(word)): return True
-        for _ in self.query('auxpass(?w, {})'.format(word)): return True
-        return False
+        atoms = self.evidence_index().atoms
+        return any(args[1] == word and truth >= 1 for pred in ('aux', 'auxpass')
+                   for args, truth in atoms(pred).items())
 
 
     def is_pronoun(self, word):
@@ -714,9 +1128,8 @@ class PRACDatabase(Database):
 
         :return: (bool)
         '''
-        for _ in self.query('has_pos({}, PRP)'.format(word)):  return True
-        for _ in self.query('has_pos({}, PRP$)'.format(word)): return True
-        return False
+        atoms = self.evidence_index().atoms('has_pos', word)
+        return any(atoms.get((word, pos), 0) >= 1 for pos in ('PRP', 'PRP$'))
 
 
     def is_wh(self, word):
@@ -726,9 +1139,8 @@ class PRACDatabase(Database):
 
         :return:    (bool)
         '''
-        for _ in self.query('has_pos({}, WDT)'.format(word)): return True
-        for _ in self.query('has_pos({}, WP)'.format(word)): return True
-        return False
+        atoms = self.evidence_index().atoms('has_pos', word)
+        return any(atoms.get((word, pos), 0) >= 1 for pos in ('WDT', 'WP'))
 
 
     def objs(self, mlnpred, predicate=None, conj=False):
@@ -842,7 +1254,7 @@ class PRACDatabase(Database):
         result = []
 
         for atom, truth in self.evidence.iteritems():
-            predname, args = self.mln.parse_atom(atom)
+            _, predname, args = parse_literal(atom, self.mln.logic)
             if truth == 1.:
                 if predicate is None or predicate is not None and args[0] == predicate.word:
                     obj_word = args[1]
@@ -863,14 +1275,10 @@ class PRACDatabase(Database):
         '''
         :return:    Returns a generator yielding all syntactic relations of the form relations- in this database
         '''
-        preds = [p.name for p in self.prac.module('nl_parsing').mln.predicates] + ['has_pos']
-        relations = defaultdict(list)
-        for atom, _ in self.evidence.iteritems():
-            _, pred, args = self.prac.mln.logic.parse_literal(atom)
-            if pred not in preds: continue 
-            relations[pred].append(args)
-        for pred, args in relations.iteritems():
-            yield pred, args
+        preds = self.prac.syntax_predicates
+        for pred, atoms in self.evidence_index().preds.items():
+            if pred not in preds or not atoms: continue
+            yield pred, [list(args) for args in atoms]
             
     
     def sense(self, word):
@@ -880,8 +1288,8 @@ class PRACDatabase(Database):
         :param word:    (str) the symbol representing the word in this database
         :return:        (str) the concept of the sense.
         '''
-        for q in self.query('has_sense(%s, ?sense)' % word):
-            return q['?sense']
+        for _, sense in self._true('has_sense', word):
+            return sense
             
             
 
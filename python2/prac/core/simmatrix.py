@@ -0,0 +1,185 @@
+# PROBABILISTIC ROBOT ACTION CORES
+#
+# (C) 2016 by Daniel Nyga (nyga@cs.uni-bremen.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import json
+import os
+
+import numpy as np
+from dnutils import logs, ifnone
+
+from prac.core import locations
+from prac.core.wnstore import wordnet_version
+
+
+logger = logs.getlogger(__name__, logs.INFO)
+
+# version of the file format. Increment on every change.
+FORMAT_VERSION = 1
+
+
+class SimilarityMatrix(object):
+    '''
+    Precomputed semantic similarities between word senses and the concepts
+    of the PRAC models.
+
+    The similarities are stored in a dense NumPy array, whose rows correspond
+    to the senses and whose columns correspond to the concepts, and in a JSON
+    file holding the names of the rows and columns. The array is memory-mapped
+    read-only when it is loaded, such that all processes using the same file
+    share one copy of it in memory.
+    '''
+
+    def __init__(self, senses, concepts, matrix, simtype='path'):
+        '''
+        :param senses:      the synset names of the rows
+        :param concepts:    the concept names of the columns
+        :param matrix:      the array of similarities
+        :param simtype:     the similarity measure the values were computed by
+        '''
+        self.senses = list(senses)
+        self.concepts = list(concepts)
+        self.matrix = matrix
+        self.simtype = simtype
+        self._rows = {s: i for i, s in enumerate(self.senses)}
+        self._cols = {c: i for i, c in enumerate(self.concepts)}
+
+
+    def get(self, sense, concept):
+        '''
+        Returns the similarity of ``sense`` and ``concept``, or ``None`` if
+        one of them is not contained in the matrix.
+        '''
+        i = self._rows.get(sense)
+        j = self._cols.get(concept)
+        if i is None or j is None:
+            return None
+        return float(self.matrix[i, j])
+
+
+    def submatrix(self, senses, concepts):
+        '''
+        Returns the similarities of all pairs of ``senses`` and ``concepts``
+        as an array of shape ``(len(senses), len(concepts))``, or ``None`` if
+        any of them is not contained in the matrix.
+        '''
+        rows = [self._rows.get(s) for s in senses]
+        cols = [self._cols.get(c) for c in concepts]
+        if None in rows or None in cols:
+            return None
+        return np.asarray(self.matrix[np.ix_(rows, cols)], dtype=np.float64)
+
+
+    def __contains__(self, sense):
+        return sense in self._rows
+
+
+    @staticmethod
+    def build(wordnet, senses, concepts, simtype='path'):
+        '''
+        Computes the similarities of all ``senses`` and ``concepts``.
+
+        :param wordnet:     the ``prac.core.wordnet.WordNet`` instance used to
+                            compute the similarities
+        :param senses:      an iterable of synset names
+        :param concepts:    an iterable of concept names
+        :param simtype:     the similarity measure passed to
+                            ``WordNet.similarity_matrix``
+        '''
+        rows = {}
+        for s in senses:
+            try:
+                synset = wordnet.synset(s)
+            except Exception:
+                logger.warning('skipping unknown sense %s' % s)
+                continue
+            rows[synset.name()] = synset
+        columns = []
+        for c in sorted(set(concepts)):
+            try:
+                wordnet.synset(c)
+            except Exception:
+                logger.warning('skipping unknown concept %s' % c)
+                continue
+            columns.append(c)
+        senses = sorted(rows)
+        matrix = wordnet.similarity_matrix([rows[s] for s in senses], columns,
+                                           simtype)
+        return SimilarityMatrix(senses, columns, matrix, simtype)
+
+
+    def save(self, filepath=None):
+        '''
+        Stores the matrix in ``filepath`` (a ``.npy`` file) and its index in
+        the accompanying ``.json`` file. Both are written to temporary files
+        first, which replace the existing ones once they are complete, such
+        that processes that have mapped the matrix can keep on using it.
+        '''
+        filepath = ifnone(filepath, default_path())
+        dirname = os.path.dirname(filepath)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        tmppath = '%s.%d.tmp' % (filepath, os.getpid())
+        with open(tmppath, 'wb') as f:
+            np.save(f, self.matrix)
+        tmpindex = '%s.%d.tmp' % (_indexpath(filepath), os.getpid())
+        with open(tmpindex, 'w') as f:
+            json.dump({'version': FORMAT_VERSION, 'wordnet': wordnet_version(),
+                       'simtype': self.simtype, 'senses': self.senses,
+                       'concepts': self.concepts}, f)
+        os.rename(tmppath, filepath)
+        os.rename(tmpindex, _indexpath(filepath))
+
+
+    @staticmethod
+    def load(filepath=None):
+        '''
+        Maps the matrix stored in ``filepath`` read-only into memory.
+
+        :return:    the ``SimilarityMatrix`` or ``None`` if the file does not
+                    exist or has been computed by a different version of PRAC
+                    or WordNet.
+        '''
+        filepath = ifnone(filepath, default_path())
+        if not os.path.exists(filepath) or not os.path.exists(_indexpath(filepath)):
+            return None
+        with open(_indexpath(filepath)) as f:
+            index = json.load(f)
+        if index.get('version') != FORMAT_VERSION or index.get('wordnet') != wordnet_version():
+            logger.warning('ignoring outdated similarity matrix %s' % filepath)
+            return None
+        matrix = np.load(filepath, mmap_mode='r')
+        if matrix.shape != (len(index['senses']), len(index['concepts'])):
+            # the matrix is being replaced
+            return None
+        return SimilarityMatrix(index['senses'], index['concepts'], matrix, index['simtype'])
+
+
+def _indexpath(filepath):
+    return os.path.splitext(filepath)[0] + '.json'
+
+
+def default_path():
+    '''
+    Returns the default location of the similarity matrix in the PRAC user
+    data directory.
+    '''
+    return os.path.join(locations.user_data, 'simmatrix.npy')
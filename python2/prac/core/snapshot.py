@@ -0,0 +1,180 @@
+# PROBABILISTIC ROBOT ACTION CORES
+#
+# (C) 2016 by Daniel Nyga (nyga@cs.uni-bremen.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import glob
+import hashlib
+import os
+import cPickle as pickle
+import sys
+
+from dnutils import logs
+
+from prac.core import locations
+
+
+logger = logs.getlogger(__name__, logs.INFO)
+
+# version of the file format. Increment on every change.
+FORMAT_VERSION = 1
+
+
+def source_files():
+    '''
+    Returns the paths of all files the initialization of PRAC depends on:
+    the action core definitions, the manifests, predicate declarations and
+    projects of all modules, and the sources of the PRAC core.
+    '''
+    files = [os.path.join(locations.models, 'actioncores.yaml'),
+             os.path.join(os.path.dirname(__file__), 'base.py'),
+             os.path.join(os.path.dirname(__file__), 'snapshot.py')]
+    for name in sorted(os.listdir(locations.pracmodules)):
+        path = os.path.join(locations.pracmodules, name)
+        if not os.path.isdir(path):
+            continue
+        files.append(os.path.join(path, 'pracmodule.yaml'))
+        files.extend(sorted(glob.glob(os.path.join(path, 'mln', '*.mln'))))
+        files.extend(sorted(glob.glob(os.path.join(path, '*.pracmln'))))
+    return files
+
+
+def source_fingerprint():
+    '''
+    Returns a hash of the paths, sizes and modification times of all
+    ``source_files()``, which changes whenever one of them does.
+    '''
+    h = hashlib.sha1()
+    h.update(('%d %s' % (FORMAT_VERSION, sys.version)).encode('utf8'))
+    for filepath in source_files():
+        if os.path.exists(filepath):
+            st = os.stat(filepath)
+            h.update(('%s %d %d\n' % (filepath, st.st_size, int(st.st_mtime * 1000))).encode('utf8'))
+        else:
+            h.update(('%s -\n' % filepath).encode('utf8'))
+    return h.hexdigest()
+
+
+def snapshot_path():
+    return os.path.join(locations.user_data, 'pracsnapshot.pickle')
+
+
+class PRACSnapshot(object):
+    '''
+    The state of an initialized PRAC instance that is expensive to compute:
+    the action cores, the module manifests, the predicates of the global
+    MLN and the MLN projects and MLNs in ``mlncache``.
+
+    The global MLN is stored by its predicates only, such that restoring it
+    does not involve the MLN parser. Cached projects and MLNs that cannot be
+    pickled are skipped.
+    '''
+
+    def __init__(self, fingerprint, actioncores, manifests, predicates, mlns):
+        '''
+        :param fingerprint:     the ``source_fingerprint()`` of the sources
+                                the snapshot has been taken from
+        :param actioncores:     the dictionary of ``ActionCore`` objects
+        :param manifests:       the list of ``PRACModuleManifest`` objects
+        :param predicates:      the predicates of the global MLN
+        :param mlns:            a list of (key, value) items of ``mlncache``
+        '''
+        self.fingerprint = fingerprint
+        self.actioncores = actioncores
+        self.manifests = manifests
+        self.predicates = predicates
+        self.mlns = mlns
+
+
+    @staticmethod
+    def capture(prac, fingerprint=None):
+        '''
+        Takes a snapshot of the given ``PRAC`` instance.
+        '''
+        from prac.core.base import mlncache
+        mlns = []
+        for key, value in mlncache.items():
+            try:
+                pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                logger.debug('not storing %s in PRAC snapshot' % str(key[:3]))
+                continue
+            mlns.append((key, value))
+        fingerprint = fingerprint if fingerprint is not None else source_fingerprint()
+        return PRACSnapshot(fingerprint, prac.actioncores, list(prac._manifests),
+                            list(prac.mln.predicates), mlns)
+
+
+    def restore(self, prac):
+        '''
+        Sets the action cores, manifests and global MLN of ``prac`` and fills
+        ``mlncache`` from this snapshot.
+        '''
+        from prac.core.base import mlncache
+        from pracmln import MLN
+        prac.actioncores = self.actioncores
+        prac._manifests = list(self.manifests)
+        prac._manifests_by_name = {m.name: m for m in self.manifests}
+        mln = MLN(logic='FuzzyLogic', grammar='PRACGrammar')
+        for pred in self.predicates:
+            mln.predicate(pred)
+        prac.mln = mln
+        for key, value in self.mlns:
+            mlncache.put(key, value)
+
+
+    def save(self, filepath=None):
+        '''
+        Writes the snapshot to ``filepath``, replacing an existing file only
+        once the new one is complete.
+        '''
+        filepath = filepath or snapshot_path()
+        dirname = os.path.dirname(filepath)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        tmppath = '%s.%d.tmp' % (filepath, os.getpid())
+        with open(tmppath, 'wb') as f:
+            pickle.dump((FORMAT_VERSION, self), f, pickle.HIGHEST_PROTOCOL)
+        os.rename(tmppath, filepath)
+
+
+    @staticmethod
+    def load(filepath=None, fingerprint=None):
+        '''
+        Loads the snapshot stored in ``filepath``.
+
+        :return:    the ``PRACSnapshot``, or ``None`` if the file does not
+                    exist, cannot be read or has been taken from sources
+                    different from the current ones.
+        '''
+        filepath = filepath or snapshot_path()
+        if not os.path.exists(filepath):
+            return None
+        try:
+            with open(filepath, 'rb') as f:
+                version, snapshot = pickle.load(f)
+        except Exception:
+            logger.warning('could not read PRAC snapshot %s' % filepath)
+            return None
+        fingerprint = fingerprint if fingerprint is not None else source_fingerprint()
+        if version != FORMAT_VERSION or snapshot.fingerprint != fingerprint:
+            logger.debug('ignoring outdated PRAC snapshot %s' % filepath)
+            return None
+        return snapshot
@@ -0,0 +1,241 @@
+# PROBABILISTIC ROBOT ACTION CORES
+#
+# (C) 2016 by Daniel Nyga (nyga@cs.uni-bremen.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import os
+from threading import RLock
+
+import numpy as np
+from dnutils import logs
+from nltk.corpus import wordnet
+
+from prac.core import locations
+from prac.core.wnstore import wordnet_version
+
+
+logger = logs.getlogger(__name__, logs.INFO)
+
+# version of the file format. Increment on every change.
+FORMAT_VERSION = 1
+
+# the parts of speech covered by the index
+POS = ('n', 'v')
+
+
+class TaxonomyIndex(object):
+    '''
+    Precomputed ancestors and depths of all synsets in the noun and verb
+    hierarchies of WordNet.
+
+    For every synset, the index holds the set of its hypernyms (including
+    instance hypernyms and the synset itself) together with their shortest
+    distances, as well as its minimal and maximal depth. Lowest common
+    hypernyms, depths and hypernymy checks thus reduce to set intersections
+    and lookups. The results are identical to the respective NLTK methods
+    without simulated roots.
+
+    The ancestors are stored as flat integer arrays, which are indexed by
+    ``offsets``, and are only turned into dictionaries on demand.
+    '''
+
+    def __init__(self, names, offsets, ancestors, distances, mindepths, maxdepths):
+        self.names = [str(n) for n in names]
+        self.offsets = offsets
+        self.ancestors_ = ancestors
+        self.distances = distances
+        self.mindepths = mindepths
+        self.maxdepths = maxdepths
+        self.ids = {n: i for i, n in enumerate(self.names)}
+        self._ancestors = {}
+
+
+    def __contains__(self, name):
+        return name in self.ids
+
+
+    def __len__(self):
+        return len(self.names)
+
+
+    def ancestors(self, name):
+        '''
+        Returns a dictionary mapping the names of all hypernyms of the synset
+        ``name`` (including itself) to their shortest distance from it.
+        '''
+        anc = self._ancestors.get(name)
+        if anc is None:
+            i = self.ids[name]
+            start, end = self.offsets[i], self.offsets[i + 1]
+            anc = {self.names[a]: int(d) for a, d in zip(self.ancestors_[start:end], self.distances[start:end])}
+            self._ancestors[name] = anc
+        return anc
+
+
+    def min_depth(self, name):
+        return int(self.mindepths[self.ids[name]])
+
+
+    def max_depth(self, name):
+        return int(self.maxdepths[self.ids[name]])
+
+
+    def is_hypernym(self, hypernym, name):
+        '''
+        Returns ``True`` iff ``hypernym`` is on a hypernym path of ``name``.
+        '''
+        return hypernym in self.ancestors(name)
+
+
+    def lowest_common_hypernyms(self, name1, name2):
+        '''
+        Returns the sorted names of the common hypernyms of both synsets with
+        the maximal ``max_depth``.
+        '''
+        common = set(self.ancestors(name1)).intersection(self.ancestors(name2))
+        if not common:
+            return []
+        depth = max(self.max_depth(c) for c in common)
+        return sorted(c for c in common if self.max_depth(c) == depth)
+
+
+    def shortest_path_distance(self, name1, name2):
+        '''
+        Returns the length of the shortest hypernymy path connecting the two
+        synsets, or ``None`` if they have no common hypernym.
+        '''
+        if name1 == name2:
+            return 0
+        anc1 = self.ancestors(name1)
+        anc2 = self.ancestors(name2)
+        distances = [anc1[c] + anc2[c] for c in set(anc1).intersection(anc2)]
+        return min(distances) if distances else None
+
+
+    @staticmethod
+    def build():
+        '''
+        Computes the index from the NLTK WordNet corpus.
+        '''
+        synsets = [s for pos in POS for s in wordnet.all_synsets(pos)]
+        ids = {s.name(): i for i, s in enumerate(synsets)}
+        parents = [[ids[h.name()] for h in s.hypernyms() + s.instance_hypernyms()] for s in synsets]
+        # ancestors and depths are computed from the ones of the parents
+        closure = [None] * len(synsets)
+        mindepths = np.zeros(len(synsets), dtype=np.int16)
+        maxdepths = np.zeros(len(synsets), dtype=np.int16)
+
+        def visit(i, path):
+            if closure[i] is not None:
+                return
+            path.add(i)
+            for p in parents[i]:
+                if p not in path:  # guard against cycles
+                    visit(p, path)
+            path.discard(i)
+            ps = [p for p in parents[i] if closure[p] is not None]
+            anc = {i: 0}
+            for p in ps:
+                for a, d in closure[p].items():
+                    if d + 1 < anc.get(a, d + 2):
+                        anc[a] = d + 1
+            closure[i] = anc
+            if ps:
+                mindepths[i] = 1 + min(mindepths[p] for p in ps)
+                maxdepths[i] = 1 + max(maxdepths[p] for p in ps)
+
+        for i in range(len(synsets)):
+            visit(i, set())
+        offsets = np.zeros(len(synsets) + 1, dtype=np.int32)
+        offsets[1:] = np.cumsum([len(c) for c in closure])
+        ancestors = np.empty(offsets[-1], dtype=np.int32)
+        distances = np.empty(offsets[-1], dtype=np.int16)
+        for i, c in enumerate(closure):
+            items = sorted(c.items())
+            ancestors[offsets[i]:offsets[i + 1]] = [a for a, _ in items]
+            distances[offsets[i]:offsets[i + 1]] = [d for _, d in items]
+        return TaxonomyIndex([s.name() for s in synsets], offsets, ancestors, distances, mindepths, maxdepths)
+
+
+    def save(self, filepath):
+        '''
+        Writes the index to ``filepath``, replacing an existing file only
+        once the new one is complete.
+        '''
+        dirname = os.path.dirname(filepath)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        tmppath = '%s.%d.tmp' % (filepath, os.getpid())
+        with open(tmppath, 'wb') as f:
+            np.savez(f, names=np.array(self.names), offsets=self.offsets,
+                     ancestors=self.ancestors_, distances=self.distances,
+                     mindepths=self.mindepths, maxdepths=self.maxdepths)
+        os.rename(tmppath, filepath)
+
+
+    @staticmethod
+    def load(filepath):
+        data = np.load(filepath)
+        return TaxonomyIndex(data['names'].tolist(), data['offsets'], data['ancestors'],
+                             data['distances'], data['mindepths'], data['maxdepths'])
+
+
+def index_paths():
+    '''
+    Returns the candidate locations of the index file: next to the NLTK data
+    of PRAC, and in the user data directory if the former is not writable.
+    '''
+    filename = 'wnindex-%s-v%d.npz' % (wordnet_version(), FORMAT_VERSION)
+    return [os.path.join(locations.data, filename), os.path.join(locations.user_data, filename)]
+
+
+_index = None
+_indexlock = RLock()
+
+
+def taxonomy_index():
+    '''
+    Returns the process-wide taxonomy index. It is loaded from disk, or built
+    and stored if it does not exist yet.
+    '''
+    global _index
+    if _index is not None:
+        return _index
+    with _indexlock:
+        if _index is not None:
+            return _index
+        paths = index_paths()
+        for filepath in paths:
+            if os.path.exists(filepath):
+                try:
+                    _index = TaxonomyIndex.load(filepath)
+                    return _index
+                except Exception:
+                    logger.warning('could not load WordNet index from %s' % filepath)
+        logger.info('building WordNet taxonomy index...')
+        index = TaxonomyIndex.build()
+        for filepath in paths:
+            try:
+                index.save(filepath)
+                break
+            except (IOError, OSError):
+                continue
+        _index = index
+        return _index
@@ -0,0 +1,388 @@
+# PROBABILISTIC ROBOT ACTION CORES
+#
+# (C) 2016 by Daniel Nyga (nyga@cs.uni-bremen.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import argparse
+import json
+import os
+import shutil
+from threading import RLock
+
+import nltk
+import numpy as np
+from dnutils import logs
+from nltk.corpus import wordnet
+
+from prac.core import locations
+
+
+logger = logs.getlogger(__name__, logs.INFO)
+
+# version of the file format. Increment on every change.
+FORMAT_VERSION = 1
+
+# the parts of speech of the lemma index. Adjective satellites are looked up
+# as adjectives, just like NLTK does.
+POS = ('n', 'v', 'a', 'r')
+
+ARRAYS = ('names', 'pos', 'hypoffsets', 'hypernymids', 'mindepths', 'maxdepths',
+          'deroffsets', 'derivations', 'lemmas', 'lemoffsets', 'lemsynsets')
+
+
+def corpus_fingerprint():
+    '''
+    Identifies the installed WordNet corpus by its location and modification
+    time, without loading it.
+    '''
+    root = nltk.data.find('corpora/wordnet')
+    path = root.zipfile.filename if hasattr(root, 'zipfile') else root.path
+    return '%s:%d' % (os.path.realpath(path), int(os.path.getmtime(path)))
+
+
+def _csr(rows):
+    offsets = np.zeros(len(rows) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(r) for r in rows])
+    values = np.array([v for r in rows for v in r], dtype=np.int32)
+    return offsets, values
+
+
+class WordNetStore(object):
+    '''
+    Compact, read-only copy of the WordNet data used by PRAC: the names and
+    parts of speech of all synsets, their hypernyms, depths and
+    derivationally related synsets, the synsets of all lemmas, and the
+    morphological rules and exceptions of NLTK's ``morphy``.
+
+    All tables are NumPy arrays, which are memory-mapped when the store is
+    loaded, such that it is available without parsing the WordNet corpus
+    and all processes share one copy of it in the page cache. Names are
+    looked up by bisection in the sorted arrays of synset names and lemmas.
+    '''
+
+    def __init__(self, header, arrays):
+        '''
+        :param header:  a dictionary holding the WordNet version, the
+                        morphological substitutions and the exceptions
+        :param arrays:  a dictionary holding the arrays in ``ARRAYS``
+        '''
+        self.header = header
+        self.version = header['wordnet']
+        self.substitutions = {pos: [tuple(s) for s in subst] for pos, subst in header['substitutions'].items()}
+        self.exceptions = header['exceptions']
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+
+
+    def _find(self, array, key):
+        key = key.encode('utf8')
+        i = int(np.searchsorted(array, key))
+        if i < len(array) and array[i] == key:
+            return i
+        return None
+
+
+    def _name(self, i):
+        return self.names[i].decode('utf8')
+
+
+    def __contains__(self, name):
+        return self._find(self.names, name) is not None
+
+
+    def __len__(self):
+        return len(self.names)
+
+
+    def _lemma_synsets(self, lemma, pos):
+        i = self._find(self.lemmas, '%s %s' % (lemma, pos))
+        if i is None:
+            return None
+        return self.lemsynsets[self.lemoffsets[i]:self.lemoffsets[i + 1]]
+
+
+    def morphy(self, form, pos):
+        '''
+        Returns the base forms of ``form``, which are lemmas of WordNet with
+        the part of speech ``pos``, like ``WordNetCorpusReader._morphy``.
+        '''
+        pos = 'a' if pos == 's' else pos
+        exceptions = self.exceptions[pos]
+        substitutions = self.substitutions[pos]
+
+        def apply_rules(forms):
+            return [f[:-len(old)] + new for f in forms for old, new in substitutions if f.endswith(old)]
+
+        def filter_forms(forms):
+            result = []
+            for f in forms:
+                if f not in result and self._lemma_synsets(f, pos) is not None:
+                    result.append(f)
+            return result
+
+        if form in exceptions:
+            return filter_forms([form] + exceptions[form])
+        forms = apply_rules([form])
+        results = filter_forms([form] + forms)
+        if results:
+            return results
+        while forms:
+            forms = apply_rules(forms)
+            results = filter_forms(forms)
+            if results:
+                return results
+        return []
+
+
+    def lemmatize(self, word, pos):
+        '''
+        Returns the lemma of ``word`` like ``WordNetLemmatizer.lemmatize``.
+        '''
+        lemmas = self.morphy(word, pos)
+        return min(lemmas, key=len) if lemmas else word
+
+
+    def synset_names(self, word, pos):
+        '''
+        Returns the names of the synsets of ``word`` with the part of speech
+        ``pos`` in the same order as ``wordnet.synsets(word, pos)``.
+        '''
+        if pos is None:
+            return [n for p in POS for n in self.synset_names(word, p)]
+        lookup = 'a' if pos == 's' else pos
+        if lookup not in POS:
+            return []
+        word = word.lower()
+        return [self._name(i) for form in self.morphy(word, lookup) for i in self._lemma_synsets(form, lookup)]
+
+
+    def pos_of(self, name):
+        return chr(self.pos[self._find(self.names, name)])
+
+
+    def hypernyms(self, name):
+        '''
+        Returns the names of the hypernyms and instance hypernyms of the
+        synset ``name``.
+        '''
+        i = self._find(self.names, name)
+        return [self._name(h) for h in self.hypernymids[self.hypoffsets[i]:self.hypoffsets[i + 1]]]
+
+
+    def derivationally_related(self, name):
+        '''
+        Returns the sorted names of the synsets of the derivationally related
+        forms of all lemmas of the synset ``name``.
+        '''
+        i = self._find(self.names, name)
+        return [self._name(d) for d in self.derivations[self.deroffsets[i]:self.deroffsets[i + 1]]]
+
+
+    def min_depth(self, name):
+        return int(self.mindepths[self._find(self.names, name)])
+
+
+    def max_depth(self, name):
+        return int(self.maxdepths[self._find(self.names, name)])
+
+
+    @staticmethod
+    def build():
+        '''
+        Compiles the store from the NLTK WordNet corpus.
+        '''
+        synsets = sorted(wordnet.all_synsets(), key=lambda s: s.name().encode('utf8'))
+        ids = {s.name(): i for i, s in enumerate(synsets)}
+        parents = [[ids[h.name()] for h in s.hypernyms() + s.instance_hypernyms()] for s in synsets]
+        mindepths = np.zeros(len(synsets), dtype=np.int16)
+        maxdepths = np.zeros(len(synsets), dtype=np.int16)
+        done = [False] * len(synsets)
+
+        def visit(i, path):
+            if done[i]:
+                return
+            path.add(i)
+            for p in parents[i]:
+                if p not in path:  # guard against cycles
+                    visit(p, path)
+            path.discard(i)
+            ps = [p for p in parents[i] if done[p]]
+            if ps:
+                mindepths[i] = 1 + min(mindepths[p] for p in ps)
+                maxdepths[i] = 1 + max(maxdepths[p] for p in ps)
+            done[i] = True
+
+        for i in range(len(synsets)):
+            visit(i, set())
+        derivations = [sorted(set(ids[d.synset().name()] for l in s.lemmas() for d in l.derivationally_related_forms()))
+                       for s in synsets]
+        lemmas = []
+        for pos in POS:
+            for lemma in wordnet.all_lemma_names(pos):
+                offsets = wordnet._lemma_pos_offset_map[lemma][pos]
+                lemmas.append(('%s %s' % (lemma, pos), [ids[wordnet.synset_from_pos_and_offset(pos, o).name()] for o in offsets]))
+        lemmas.sort(key=lambda l: l[0].encode('utf8'))
+        hypoffsets, hypernymids = _csr(parents)
+        deroffsets, derivations = _csr(derivations)
+        lemoffsets, lemsynsets = _csr([l[1] for l in lemmas])
+        arrays = {'names': np.array([s.name().encode('utf8') for s in synsets]),
+                  'pos': np.array([ord(s.pos()) for s in synsets], dtype=np.uint8),
+                  'hypoffsets': hypoffsets, 'hypernymids': hypernymids,
+                  'mindepths': mindepths, 'maxdepths': maxdepths,
+                  'deroffsets': deroffsets, 'derivations': derivations,
+                  'lemmas': np.array([l[0].encode('utf8') for l in lemmas]),
+                  'lemoffsets': lemoffsets, 'lemsynsets': lemsynsets}
+        header = {'version': FORMAT_VERSION, 'wordnet': wordnet.get_version(),
+                  'source': corpus_fingerprint(),
+                  'substitutions': {pos: list(wordnet.MORPHOLOGICAL_SUBSTITUTIONS[pos]) for pos in POS},
+                  'exceptions': {pos: dict(wordnet._exception_map[pos]) for pos in POS}}
+        return WordNetStore(header, arrays)
+
+
+    def save(self, dirpath):
+        '''
+        Writes the store into a temporary directory next to ``dirpath`` and
+        renames it to ``dirpath`` once it is complete. An existing store is
+        moved aside and removed, such that processes that have mapped its
+        files can keep on using them.
+        '''
+        dirpath = os.path.normpath(dirpath)
+        parent = os.path.dirname(dirpath)
+        if parent and not os.path.exists(parent):
+            os.makedirs(parent)
+        tmppath = '%s.%d.tmp' % (dirpath, os.getpid())
+        if os.path.exists(tmppath):
+            shutil.rmtree(tmppath)
+        os.makedirs(tmppath)
+        try:
+            for name in ARRAYS:
+                np.save(os.path.join(tmppath, '%s.npy' % name), getattr(self, name))
+            # the header is written last, such that it marks a complete store
+            with open(os.path.join(tmppath, 'header.json'), 'w') as f:
+                json.dump(self.header, f)
+        except Exception:
+            shutil.rmtree(tmppath, ignore_errors=True)
+            raise
+        oldpath = None
+        if os.path.exists(dirpath):
+            oldpath = '%s.%d.old' % (dirpath, os.getpid())
+            os.rename(dirpath, oldpath)
+        try:
+            os.rename(tmppath, dirpath)
+        except OSError:
+            if oldpath is not None:
+                os.rename(oldpath, dirpath)
+            shutil.rmtree(tmppath, ignore_errors=True)
+            raise
+        if oldpath is not None:
+            shutil.rmtree(oldpath, ignore_errors=True)
+
+
+    @staticmethod
+    def load(dirpath):
+        '''
+        Maps the store in ``dirpath`` read-only into memory.
+
+        :return:    the ``WordNetStore`` or ``None`` if it does not exist or
+                    has been compiled by a different version of PRAC or from
+                    a different WordNet corpus.
+        '''
+        headerpath = os.path.join(dirpath, 'header.json')
+        if not os.path.exists(headerpath):
+            return None
+        with open(headerpath) as f:
+            header = json.load(f)
+        if header.get('version') != FORMAT_VERSION or header.get('source') != corpus_fingerprint():
+            logger.warning('ignoring outdated WordNet store %s' % dirpath)
+            return None
+        arrays = {name: np.load(os.path.join(dirpath, '%s.npy' % name), mmap_mode='r') for name in ARRAYS}
+        return WordNetStore(header, arrays)
+
+
+def store_paths():
+    '''
+    Returns the candidate locations of the store: next to the NLTK data of
+    PRAC, and in the user data directory if the former is not writable.
+    '''
+    dirname = 'wnstore-v%d' % FORMAT_VERSION
+    return [os.path.join(locations.data, dirname), os.path.join(locations.user_data, dirname)]
+
+
+_store = None
+_storelock = RLock()
+
+
+def wordnet_store(build=True):
+    '''
+    Returns the process-wide WordNet store. It is loaded from disk, or
+    compiled and stored if it does not exist yet.
+
+    :param build:   if ``False``, ``None`` is returned instead of compiling
+                    a missing store.
+    '''
+    global _store
+    if _store is not None:
+        return _store
+    with _storelock:
+        if _store is not None:
+            return _store
+        paths = store_paths()
+        for dirpath in paths:
+            try:
+                _store = WordNetStore.load(dirpath)
+            except Exception:
+                logger.warning('could not load WordNet store from %s' % dirpath)
+            if _store is not None:
+                return _store
+        if not build:
+            return None
+        logger.info('compiling WordNet store...')
+        store = WordNetStore.build()
+        for dirpath in paths:
+            try:
+                store.save(dirpath)
+                break
+            except (IOError, OSError):
+                continue
+        _store = store
+        return _store
+
+
+def wordnet_version():
+    '''
+    Returns the version of the WordNet corpus, which is taken from the store
+    if it exists, so that the corpus does not need to be loaded.
+    '''
+    store = wordnet_store(build=False)
+    if store is not None:
+        return store.version
+    return wordnet.get_version()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compile the WordNet store of PRAC.')
+    parser.add_argument('--output', '-o', dest='output', default=store_paths()[0], help='The directory the store is written to. Defaults to %(default)s.')
+    args = parser.parse_args()
+    WordNetStore.build().save(args.output)
+    print('Stored the WordNet store in {}'.format(args.output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+# PROBABILISTIC ROBOT ACTION CORES
+#
+# (C) 2016 by Daniel Nyga (nyga@cs.uni-bremen.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import hashlib
+import json
+import os
+from threading import RLock
+
+from dnutils import logs
+from nltk.corpus import wordnet
+
+from prac.core import locations
+from prac.core.wnstore import wordnet_version
+from prac.pracutils.graph import DAG, Node
+from prac.pracutils.utils import LRUCache
+
+
+logger = logs.getlogger(__name__, logs.INFO)
+
+# version of the file format. Increment on every change.
+FORMAT_VERSION = 1
+
+ROOT = 'entity.n.01'
+
+
+class ConceptTaxonomy(object):
+    '''
+    The part of the WordNet taxonomy that is spanned by the hypernym paths of
+    a set of concepts.
+
+    The graph is represented by the synset names of its nodes and by its
+    (parent, child) edges, both for the full and the collapsed taxonomy, in
+    which all nodes with only one parent and one child are removed. The
+    full taxonomy is kept such that concepts can be added incrementally.
+
+    Every hypernym path of a concept is included that starts at the root
+    ``entity.n.01`` or at one of the concepts. Concepts without such a path
+    (most verbs and adjectives) are isolated nodes.
+    '''
+
+    def __init__(self, concepts, nodes, edges, collapse=True):
+        '''
+        :param concepts:    the names of the concepts spanning the taxonomy
+        :param nodes:       the names of all nodes of the full taxonomy
+        :param edges:       the (parent, child) edges of the full taxonomy
+        :param collapse:    whether or not the collapsed taxonomy is used
+        '''
+        self.concepts = frozenset(concepts)
+        self.nodes = set(nodes)
+        self.nodes.add(ROOT)
+        self.edges = set(edges)
+        self.collapse = collapse
+        self._key = None
+        if collapse:
+            self.cnodes, self.cedges = self._collapsed()
+        else:
+            self.cnodes, self.cedges = set(self.nodes), set(self.edges)
+
+
+    @staticmethod
+    def build(concepts, collapse=True):
+        '''
+        Creates the taxonomy of the given concept names from scratch.
+        '''
+        return ConceptTaxonomy([], [], [], collapse).extend(concepts)
+
+
+    def extend(self, concepts):
+        '''
+        Returns a new taxonomy, which additionally contains the given
+        concepts. Only the hypernym paths of the new concepts are computed,
+        unless one of them is the root of a path of the known concepts.
+        '''
+        new = sorted(set(c for c in concepts if c != 'null').difference(self.concepts))
+        if not new:
+            return self
+        synsets = [wordnet.synset(c) for c in new]
+        if self.concepts and any(s.name() != ROOT and not s.hypernyms() and not s.instance_hypernyms()
+                                 for s in synsets):
+            # paths of the known concepts may start at a new one
+            return ConceptTaxonomy.build(self.concepts.union(new), self.collapse)
+        allconcepts = self.concepts.union(new)
+        nodes = set(self.nodes)
+        edges = set(self.edges)
+        for synset in synsets:
+            nodes.add(synset.name())
+            for path in synset.hypernym_paths():
+                names = [s.name() for s in path]
+                if names[0] != ROOT and names[0] not in allconcepts:
+                    continue
+                nodes.update(names)
+                edges.update(zip(names[:-1], names[1:]))
+        return ConceptTaxonomy(allconcepts, nodes, edges, self.collapse)
+
+
+    def _collapsed(self):
+        '''
+        Removes all nodes below the root that have one parent and one child,
+        unless the child has multiple parents.
+        '''
+        children = {n: set() for n in self.nodes}
+        parents = {n: set() for n in self.nodes}
+        for p, c in self.edges:
+            children[p].add(c)
+            parents[c].add(p)
+        removed = set()
+        queue = sorted(children[ROOT])
+        while queue:
+            node = queue.pop()
+            if node in removed:
+                continue
+            keep = not (len(children[node]) == 1 and len(parents[node]) == 1)
+            for c in children[node]:
+                keep |= len(parents[c]) > 1
+            if not keep:
+                removed.add(node)
+                for p in parents[node]:
+                    children[p].remove(node)
+                    children[p].update(children[node])
+                for c in children[node]:
+                    parents[c].remove(node)
+                    parents[c].update(parents[node])
+            queue.extend(sorted(children[node]))
+        nodes = self.nodes.difference(removed)
+        return nodes, set((p, c) for p in nodes for c in children[p])
+
+
+    @property
+    def key(self):
+        '''
+        The hash identifying this taxonomy (see ``taxonomy_key()``).
+        '''
+        if self._key is None:
+            self._key = taxonomy_key(self.concepts, self.collapse)
+        return self._key
+
+
+    def graph(self):
+        '''
+        Returns the collapsed taxonomy as a ``DAG`` and a dictionary mapping
+        the synset names to their nodes.
+        '''
+        known_concepts = {n: Node(n, n) for n in self.cnodes}
+        for p, c in self.cedges:
+            known_concepts[p].addChild(known_concepts[c])
+        return DAG(root=known_concepts[ROOT]), known_concepts
+
+
+    def save(self, filepath):
+        '''
+        Stores the taxonomy in a JSON file, whose edges refer to the indices
+        of the nodes. An existing file is replaced only once the new one is
+        complete.
+        '''
+        nodes = sorted(self.nodes)
+        ids = {n: i for i, n in enumerate(nodes)}
+        dirname = os.path.dirname(filepath)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        tmppath = '%s.%d.tmp' % (filepath, os.getpid())
+        with open(tmppath, 'w') as f:
+            json.dump({'version': FORMAT_VERSION, 'wordnet': wordnet_version(),
+                       'collapse': self.collapse, 'concepts': sorted(self.concepts),
+                       'nodes': nodes,
+                       'edges': sorted([ids[p], ids[c]] for p, c in self.edges),
+                       'cnodes': sorted(ids[n] for n in self.cnodes),
+                       'cedges': sorted([ids[p], ids[c]] for p, c in self.cedges)},
+                      f, separators=(',', ':'))
+        os.rename(tmppath, filepath)
+
+
+    @staticmethod
+    def load(filepath):
+        '''
+        Loads a taxonomy stored by ``save()``.
+
+        :return:    the ``ConceptTaxonomy`` or ``None`` if it has been stored
+                    by a different version of PRAC or WordNet.
+        '''
+        with open(filepath) as f:
+            data = json.load(f)
+        if data.get('version') != FORMAT_VERSION or data.get('wordnet') != wordnet_version():
+            return None
+        nodes = [str(n) for n in data['nodes']]
+        taxonomy = ConceptTaxonomy.__new__(ConceptTaxonomy)
+        taxonomy.concepts = frozenset(str(c) for c in data['concepts'])
+        taxonomy.collapse = data['collapse']
+        taxonomy._key = None
+        taxonomy.nodes = set(nodes)
+        taxonomy.edges = set((nodes[p], nodes[c]) for p, c in data['edges'])
+        taxonomy.cnodes = set(nodes[n] for n in data['cnodes'])
+        taxonomy.cedges = set((nodes[p], nodes[c]) for p, c in data['cedges'])
+        return taxonomy
+
+
+def taxonomy_key(concepts, collapse=True):
+    '''
+    Returns a hash identifying the taxonomy of the given concepts.
+    '''
+    concepts = sorted(set(c for c in concepts if c != 'null'))
+    text = '%d\n%s\n%s\n%s' % (FORMAT_VERSION, wordnet_version(), collapse, '\n'.join(concepts))
+    return hashlib.sha1(text.encode('utf8')).hexdigest()
+
+
+def taxonomy_path(key):
+    return os.path.join(locations.user_data, 'taxonomies', '%s.json' % key)
+
+
+# the taxonomies built or loaded in this process
+taxonomies = LRUCache(maxsize=16)
+_taxonomylock = RLock()
+
+
+def concept_taxonomy(concepts, collapse=True, base=None):
+    '''
+    Returns the taxonomy of the given concepts.
+
+    It is taken from the taxonomies of this process or from its file in the
+    user data directory, if it exists. Otherwise, it is derived from ``base``
+    or from the largest known taxonomy of a subset of the concepts, and it
+    is built from scratch only if there is no such taxonomy. New taxonomies
+    are stored for later runs.
+
+    :param concepts:    the names of the concepts
+    :param collapse:    whether or not the taxonomy is to be collapsed
+    :param base:        a ``ConceptTaxonomy`` of a subset of the concepts
+    '''
+    concepts = set(c for c in concepts if c != 'null')
+    key = taxonomy_key(concepts, collapse)
+    with _taxonomylock:
+        taxonomy = taxonomies.get(key)
+        if taxonomy is not None:
+            return taxonomy
+        filepath = taxonomy_path(key)
+        if os.path.exists(filepath):
+            try:
+                taxonomy = ConceptTaxonomy.load(filepath)
+            except Exception:
+                logger.warning('could not load concept taxonomy from %s' % filepath)
+        if taxonomy is None:
+            if base is None or base.collapse != collapse or not base.concepts.issubset(concepts):
+                bases = [t for t in taxonomies.values() if t.collapse == collapse and t.concepts.issubset(concepts)]
+                base = max(bases, key=lambda t: len(t.concepts)) if bases else None
+            if base is not None:
+                taxonomy = base.extend(concepts)
+            else:
+                taxonomy = ConceptTaxonomy.build(concepts, collapse)
+            try:
+                taxonomy.save(filepath)
+            except (IOError, OSError):
+                logger.warning('could not store concept taxonomy in %s' % filepath)
+        taxonomies.put(key, taxonomy)
+        return taxonomy
@@ -25,7 +25,6 @@ import datetime
 from pprint import pprint
 
 from pracmln.mln.util import edict, avg
-from scipy.stats import stats
 
 from prac.db.ies import constants
 
@@ -213,6 +212,7 @@ class Howto(Frame):
         '''
         specs = [s.specifity() for s in self.steps]
         specs.append(Frame.specifity(self))
+        from scipy.stats import stats
         return stats.hmean(specs)
 
 
@@ -25,14 +25,11 @@ import os
 from dnutils import logs
 from prac.core import locations as pracloc
 
-from prac.core.base import PRACModule, PRACPIPE, PRACDatabase
+from prac.core.base import PRACModule, PRACPIPE, PRACDatabase, parse_literal
 from prac.core.inference import PRACInferenceStep, FrameNode
-from prac.pracutils.utils import prac_heading
+from prac.pracutils.utils import prac_heading, get_cond_prob_png
 from pracmln import Database
-from pracmln.mln.base import parse_mln
 from pracmln.mln.util import colorize
-from pracmln.utils.project import MLNProject
-from pracmln.utils.visualization import get_cond_prob_png
 
 
 
@@ -55,7 +52,7 @@ class ActionCoreIdentification(PRACModule):
         if params.get('project', None) is None:
             # load default project
             projectpath = os.path.join(pracloc.pracmodules, self.name, self.defproject)
-            ac_project = MLNProject.open(projectpath)
+            ac_project = self.load_project(projectpath)
         else:
             logger.info(colorize('Loading Project from params', (None, 'cyan', True), True))
             projectpath = os.path.join(params.get('projectpath', None) or os.path.join(pracloc.pracmodules, self.name), params.get('project').name)
@@ -63,15 +60,11 @@ class ActionCoreIdentification(PRACModule):
 
         dbs = node.outdbs
 
-        mlntext = ac_project.mlns.get(ac_project.queryconf['mln'], None)
-        mln = parse_mln(mlntext, searchpaths=[self.module_path], projectpath=projectpath,
-                        logic=ac_project.queryconf.get('logic', 'FirstOrderLogic'),
-                        grammar=ac_project.queryconf.get('grammar', 'PRACGrammar'))
+        mln = self.project_mln(ac_project, projectpath)
         known_concepts = mln.domains.get('concept', [])
         infstep = PRACInferenceStep(node, self)
         wnmod = self.prac.module('wn_senses')
 
-        pngs = {}
         nlinstr = node.nlinstr()
         sidx = nlinstr.idx()
         sentence = nlinstr.instr
@@ -80,7 +73,7 @@ class ActionCoreIdentification(PRACModule):
             # ==================================================================
             # Preprocessing
             # ==================================================================
-            db = wnmod.get_senses_and_similarities(db_, known_concepts)
+            db = wnmod.get_senses_and_similarities(db_, known_concepts, cache=node.pracinfer.sensecache)
             tmp_union_db = db.union(db_, mln=self.prac.mln)
             infstep.indbs.append(tmp_union_db)
             
@@ -101,10 +94,11 @@ class ActionCoreIdentification(PRACModule):
             unified_db = resultdb.union(tmp_union_db, mln=self.prac.mln)
             
 #             infstep.outdbs
-            infstep.outdbs.extend(self.extract_multiple_action_cores(self.prac, unified_db, wnmod, known_concepts))
+            infstep.outdbs.extend(self.extract_multiple_action_cores(self.prac, unified_db, wnmod, known_concepts,
+                                                                  cache=node.pracinfer.sensecache))
             
-            pngs[unified_db.domains.get('actioncore', [None])[0]] = get_cond_prob_png(ac_project.queryconf.get('queries', ''), dbs, filename=self.name)
-        infstep.png = pngs
+            infstep.add_png(unified_db.domains.get('actioncore', [None])[0], get_cond_prob_png,
+                            ac_project.queryconf.get('queries', ''), dbs, filename=self.name)
         infstep.applied_settings = ac_project.queryconf.config
         pred = None    
         for outdb in infstep.outdbs:
@@ -121,7 +115,7 @@ class ActionCoreIdentification(PRACModule):
                 raise Exception('no actioncore recognized in %s' % node)
 
 
-    def extract_multiple_action_cores(self, prac, db, wordnet_module, known_concepts):
+    def extract_multiple_action_cores(self, prac, db, wordnet_module, known_concepts, cache=None):
         '''
         TODO
 
@@ -129,6 +123,7 @@ class ActionCoreIdentification(PRACModule):
         :param db:              an instance of Database
         :param wordnet_module:  the wordnet PRACModule
         :param known_concepts:  a list of known concepts
+        :param cache:           the ``SenseCache`` of the current inference
         :return:                a list of databases
         '''
         dbs = []
@@ -166,7 +161,7 @@ class ActionCoreIdentification(PRACModule):
 
                 for atom, truth in sorted(db.evidence.iteritems()):
                     
-                    _, pred, args = db.mln.logic.parse_literal(atom)
+                    _, pred, args = parse_literal(atom, db.mln.logic)
                     
                     if pred == "is_a" or pred == "has_sense":
                         continue
@@ -197,12 +192,12 @@ class ActionCoreIdentification(PRACModule):
             
         
             #Add valid senses and is_a concepts
-            temp_sense_db = wordnet_module.get_senses_and_similarities(db_, known_concepts)
+            temp_sense_db = wordnet_module.get_senses_and_similarities(db_, known_concepts, cache=cache)
             valid_sense_list = temp_sense_db.domain('sense')
             valid_word_list = temp_sense_db.domain('word')
             
             for atom, truth in sorted(db.evidence.iteritems()):
-                _, pred, args = db.mln.logic.parse_literal(atom)
+                _, pred, args = parse_literal(atom, db.mln.logic)
                 if pred != "is_a" and pred != "has_sense": continue
                 
                 if pred == "is_a" and args[0] in valid_sense_list:
@@ -235,17 +230,15 @@ class ActionCoreIdentification(PRACModule):
                 known_concepts.append(c)
             new_dbs.append(db)
         wordnet = prac.wordnet
+        known_synsets = [wordnet.synset(c) for c in known_concepts]
         for db in new_dbs:
             new_db = db.duplicate()
-            for sol in db.query('has_sense(?w, ?s) ^ is_a(?s, ?c)'):
-                word = sol['?w']
+            sols = list(db.query('has_sense(?w, ?s) ^ is_a(?s, ?c)'))
+            sims = wordnet.similarity_matrix([wordnet.synset(sol['?c']) for sol in sols],
+                                             known_synsets, 'wup_similarity')
+            for sol, row in zip(sols, sims.tolist()):
                 sense = sol['?s']
-                concept = sol['?c']
-                synset = wordnet.synset(concept)
-                for known_concept in known_concepts:
-                    known_synset = wordnet.synset(known_concept)
-                    if known_synset is None or synset is None: sim = 0
-                    else: sim = wordnet.wup_similarity(synset, known_synset)
+                for known_concept, sim in zip(known_concepts, row):
                     new_db << ('is_a(%s,%s)' % (sense, known_concept), sim)
             training_dbs.append(new_db)
 
@@ -26,15 +26,12 @@ from pprint import pprint
 
 from dnutils import logs
 from pracmln.mln import NoConstraintsError, MLNParsingError
-from pracmln.mln.base import parse_mln
 from pracmln.mln.util import colorize, mergedom
-from pracmln.utils.project import MLNProject
-from pracmln.utils.visualization import get_cond_prob_png
 
 from prac.core import locations as pracloc
-from prac.core.base import PRACModule, PRACDatabase
+from prac.core.base import PRACModule, PRACDatabase, parse_literal
 from prac.core.inference import PRACInferenceStep, FrameNode
-from prac.pracutils.utils import prac_heading
+from prac.pracutils.utils import prac_heading, get_cond_prob_png
 
 
 logger = logs.getlogger(__name__, logs.DEBUG)
@@ -62,7 +59,6 @@ class CorefResolution(PRACModule):
         infstep = PRACInferenceStep(node, self)
         projectpath = os.path.join(pracloc.pracmodules, self.name)
         ac = None
-        pngs = {}
 
 
 
@@ -125,12 +121,8 @@ class CorefResolution(PRACModule):
 #                     print 'distance({},DIST{})'.format(w, sidx) 
             
             logger.debug('loading Project: {}'.format(colorize(actioncore, (None, 'cyan', True), True)))
-            project = MLNProject.open(os.path.join(projectpath, '{}.pracmln'.format(actioncore)))
-            mlntext = project.mlns.get(project.queryconf['mln'], None)
-            mln = parse_mln(mlntext, searchpaths=[self.module_path],
-                            projectpath=projectpath,
-                            logic=project.queryconf.get('logic', 'FuzzyLogic'),
-                            grammar=project.queryconf.get('grammar', 'PRACGrammar'))
+            project = self.load_project(os.path.join(projectpath, '{}.pracmln'.format(actioncore)))
+            mln = self.project_mln(project, projectpath, logic='FuzzyLogic')
         except MLNParsingError:
             logger.warning('Could not use MLN in project {} for coreference resolution'.format(colorize(actioncore, (None, 'cyan', True), True)))
             infstep.outdbs = [db.copy(self.prac.mln) for db in dbs]
@@ -195,7 +187,7 @@ class CorefResolution(PRACModule):
                     if infer.results[res] != 1.0:
                         continue
                     resultdb << str(res)
-                    _, _, args = self.prac.mln.logic.parse_literal(res)
+                    _, _, args = parse_literal(str(res), self.prac.mln.logic)
                     w = args[0]
                     for q in newdatabase.query('has_sense({0},?s) ^ has_pos({0},?pos)'.format(w)):
                         resultdb << 'has_sense({},{})'.format(w, q['?s'])
@@ -218,8 +210,8 @@ class CorefResolution(PRACModule):
             logger.error('Something went wrong')
             traceback.print_exc()
 
-        pngs['Coref - ' + str(node)] = get_cond_prob_png(project.queryconf.get('queries', ''), dbs, filename=self.name)
-        infstep.png = pngs
+        infstep.add_png('Coref - ' + str(node), get_cond_prob_png, project.queryconf.get('queries', ''), dbs,
+                        filename=self.name)
         infstep.applied_settings = project.queryconf.config
         return [node]
 
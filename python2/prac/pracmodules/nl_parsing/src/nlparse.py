@@ -1,21 +1,21 @@
 import json
 import os
-import re
 import jpype
 import prac
 from prac import java
-from pracmln import MLN
 from nlparsing import StanfordParser
 from optparse import OptionParser
 
+STANFORD_PARSER = 'stanford-parser-2015-12-09'
+
 #===============================================================================
 # set up JVM classpath
 #===============================================================================
 java.classpath.append(os.path.join(prac.locations.trdparty,
-                                   'stanford-parser-2015-12-09',
+                                   STANFORD_PARSER,
                                    'stanford-parser.jar'))
 java.classpath.append(os.path.join(prac.locations.trdparty,
-                                   'stanford-parser-2015-12-09',
+                                   STANFORD_PARSER,
                                    'slf4j-api.jar'))
 
 #===============================================================================
@@ -23,59 +23,66 @@ java.classpath.append(os.path.join(prac.locations.trdparty,
 #===============================================================================
 
 grammar_path = os.path.join(prac.locations.trdparty,
-                           'stanford-parser-2015-12-09',
+                           STANFORD_PARSER,
                            'grammar', 
                            'englishPCFG.ser.gz')
 
-def main(args, options):
-    #===========================================================================
-    # Load the NL parsing MLN
-    #===========================================================================
-    mln = MLN(mlnfile=os.path.join(prac.locations.pracmodules, 'nl_parsing', 'mln', 'predicates.mln'),
-              grammar='PRACGrammar', logic='FuzzyLogic')
 
-    #===========================================================================
-    # Load the Java VM
-    #===========================================================================
+def load_parser(grammar=None):
+    '''
+    Starts the Java VM (if necessary) and returns a StanfordParser instance
+    with the grammar loaded.
+
+    :param grammar:     path to the serialized grammar. Defaults to the
+                        English PCFG grammar.
+    '''
     if not java.isJvmRunning():
         java.initJvm()
     if not jpype.isThreadAttachedToJVM():
         jpype.attachThreadToJVM()
-    
-    #===========================================================================
-    # # suppress the stderr outputs from the parser
-    #===========================================================================
+    # suppress the stderr outputs from the parser
     jpype.java.lang.System.setErr(jpype.java.io.PrintStream(os.devnull))
-    
+    return StanfordParser(grammar or grammar_path)
+
+
+def parse_sentence(stanford_parser, s):
+    '''
+    Parses a single sentence and returns the ground atoms representing its
+    syntactic dependencies and part-of-speech tags.
+
+    The atoms are assembled from the relations, governors and dependents of
+    the typed dependencies and from the tagged yield of the parse, without
+    parsing the printed dependencies.
+
+    :param stanford_parser: a StanfordParser instance
+    :param s:               the sentence to be parsed
+    :return:                a list of (predname, args) tuples
+    '''
+    atoms = []
+    words = set()
+    for dep in stanford_parser.get_dependencies(s, True):
+        reln = str(dep.reln())
+        # governor and dependent are words of the form word-index
+        args = [str(dep.gov()), str(dep.dep())]
+        words.update(args)
+        # replace : by _ in stanford predicates
+        atoms.append((reln.replace(':', '_'), args))
+    for word, pos in stanford_parser.get_pos().values():
+        if word not in words:
+            continue
+        atoms.append(('has_pos', [word, pos]))
+    return atoms
+
+
+def main(args, options):
     #===========================================================================
     # Initialize the parser
     #===========================================================================
-    stanford_parser = StanfordParser(grammar_path)
+    stanford_parser = load_parser()
     dbs = []
     sentences = args
     for s in sentences:
-        db = ''
-        deps = stanford_parser.get_dependencies(json.loads(s), True)
-        deps = map(str, deps)
-        words = set()
-        for d in deps:
-            # replace : by _ in stanford predicates
-            res = re.match('(!?)(.+)\((.+)\)$', d)
-            if res:
-                d = '{}{}({})'.format(res.group(1), res.group(2).replace(':', '_'), res.group(3))
-            _, pred, args = mln.logic.parse_literal(str(d))
-            words.update(args)
-            db += '{}({})\n'.format(pred, ', '.join(args))
-        postags = stanford_parser.get_pos()
-        pos = []
-        for pos in postags.values():
-            if not pos[0] in words:
-                continue
-            postagatom = 'has_pos({},{})'.format(pos[0], pos[1])
-            pos.append(postagatom)
-            db += '{}\n'.format(postagatom)
-            postags[pos[0]] = pos[1]
-        dbs.append(db)
+        dbs.append(''.join('{}({})\n'.format(pred, ','.join(atomargs)) for pred, atomargs in parse_sentence(stanford_parser, json.loads(s))))
     result = '---\n'.join(dbs)
     if options.outfile is not None:
         with open(options.outfile, 'w+') as f:
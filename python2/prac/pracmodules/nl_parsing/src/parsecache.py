@@ -0,0 +1,180 @@
+# PRAC -- NATURAL LANGUAGE PARSING CACHE
+#
+# (C) 2016 by Daniel Nyga (nyga@cs.uni-bremen.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from threading import RLock
+
+from dnutils import logs, ifnone
+
+from prac.core import locations
+
+
+logger = logs.getlogger(__name__, logs.INFO)
+
+# version of the format of the cached values. Increment on every change.
+FORMAT_VERSION = 2
+
+
+class ParseCache(object):
+    '''
+    Disk-backed, content-addressed cache of the syntactic evidence produced
+    by the NL parsing module.
+
+    Entries are keyed by the kind of the result (e.g. ``parse`` or
+    ``compounds``), the whitespace-normalized sentence and a signature of
+    the parser version and the syntactic predicate declarations, such that
+    changing either of them invalidates all previous entries. If the number
+    of entries exceeds ``maxsize``, the least recently used ones are evicted.
+    '''
+
+    def __init__(self, filepath=None, maxsize=10000):
+        '''
+        :param filepath:    the sqlite file the cache is stored in. Defaults
+                            to ``parsecache.sqlite`` in the PRAC user data
+                            directory.
+        :param maxsize:     the maximal number of entries.
+        '''
+        self.filepath = ifnone(filepath, os.path.join(locations.user_data, 'parsecache.sqlite'))
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._signature = None
+        self._lock = RLock()
+        dirname = os.path.dirname(self.filepath)
+        if dirname and not os.path.exists(dirname):
+            os.makedirs(dirname)
+        self._conn = sqlite3.connect(self.filepath, timeout=30, check_same_thread=False)
+        self._conn.execute('CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT, atime REAL)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS entries_atime ON entries (atime)')
+        self._conn.commit()
+
+
+    @property
+    def signature(self):
+        '''
+        Hash of the cache format, the parser version and the syntactic
+        predicate declarations.
+        '''
+        if self._signature is None:
+            import nlparse
+            h = hashlib.sha1()
+            h.update(str(FORMAT_VERSION))
+            h.update(nlparse.STANFORD_PARSER)
+            h.update(os.path.basename(nlparse.grammar_path))
+            with open(os.path.join(locations.pracmodules, 'nl_parsing', 'mln', 'predicates.mln'), 'rb') as f:
+                h.update(f.read())
+            self._signature = h.hexdigest()
+        return self._signature
+
+
+    def key(self, kind, sentence):
+        '''
+        Returns the cache key for the ``kind`` of result of ``sentence``.
+        '''
+        normalized = ' '.join(sentence.split())
+        if isinstance(normalized, unicode):
+            normalized = normalized.encode('utf8')
+        return hashlib.sha1('\0'.join([kind, self.signature, normalized])).hexdigest()
+
+
+    def get(self, kind, sentence):
+        '''
+        Returns the cached result of ``kind`` for ``sentence``, or ``None``
+        if there is no such entry.
+        '''
+        key = self.key(kind, sentence)
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM entries WHERE key=?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute('UPDATE entries SET atime=? WHERE key=?', (time.time(), key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+
+    def put(self, kind, sentence, value):
+        '''
+        Stores ``value`` as the result of ``kind`` for ``sentence`` and evicts
+        the least recently used entries if the cache is full.
+        '''
+        key = self.key(kind, sentence)
+        with self._lock:
+            self._conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?)', (key, json.dumps(value), time.time()))
+            excess = len(self) - self.maxsize
+            if excess > 0:
+                self._conn.execute('DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY atime LIMIT ?)', (excess,))
+            self._conn.commit()
+
+
+    def clear(self):
+        '''
+        Removes all entries from the cache and resets the counters.
+        '''
+        with self._lock:
+            self._conn.execute('DELETE FROM entries')
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+
+    @property
+    def hitrate(self):
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.
+
+
+    def stats(self):
+        '''
+        Returns a dictionary with the size and the hit/miss counters.
+        '''
+        return {'entries': len(self), 'maxsize': self.maxsize, 'hits': self.hits,
+                'misses': self.misses, 'hitrate': self.hitrate}
+
+
+_cache = None
+_cachelock = RLock()
+
+
+def parse_cache(maxsize=None):
+    '''
+    Returns the process-wide parse cache.
+
+    :param maxsize:     if given, the maximal number of cache entries.
+    '''
+    global _cache
+    with _cachelock:
+        if _cache is None:
+            _cache = ParseCache()
+        if maxsize is not None:
+            _cache.maxsize = maxsize
+        return _cache
@@ -213,7 +213,6 @@ class RoleLookUp(PRACModule):
         dbs = node.outdbs
         infstep = PRACInferenceStep(node, self)
         infstep.executable_plans = []
-        pngs = {}
         for i, db in enumerate(dbs):
             # ==================================================================
             # Mongo Lookup
@@ -231,9 +230,7 @@ class RoleLookUp(PRACModule):
             # ==================================================================
             infstep.outdbs.append(db_)
             for word, actioncore in db.actioncores():
-                pngs['LookUp - ' + str(i)] = get_query_png(list(missingroles),
-                                                               dbs, filename=self.name,
-                                                               skolemword=word)
-            infstep.png = pngs
+                infstep.add_png('LookUp - ' + str(i), get_query_png, list(missingroles), dbs,
+                                filename=self.name, skolemword=word)
             infstep.applied_settings = {'module': 'missing_roles', 'method': 'DB lookup'}
         return [node]
@@ -24,18 +24,15 @@ import os
 
 import yaml
 from dnutils import logs
-from pracmln.mln.base import parse_mln
 from pracmln.mln.errors import NoConstraintsError
 from pracmln.mln.util import colorize
-from pracmln.utils.project import MLNProject
-from pracmln.utils.visualization import get_cond_prob_png
 
 import prac
 from prac.core import locations as pracloc
-from prac.core.base import PRACModule, PRACDatabase
+from prac.core.base import PRACModule, PRACDatabase, parse_literal
 from prac.core.inference import PRACInferenceStep
 from prac.db.ies.models import Object
-from prac.pracutils.utils import prac_heading
+from prac.pracutils.utils import prac_heading, get_cond_prob_png
 
 
 logger = logs.getlogger(__name__, logs.DEBUG)
@@ -76,7 +73,6 @@ class RolesTransformation(PRACModule):
         infstep = PRACInferenceStep(node, self)
 #         planlist = self.getPlanList()
 #         out(node.parent.frame, '->', node.frame)
-        pngs = {}
         for i, db_ in enumerate(dbs):
 #             db = db_.copy()
 #             db = PRACDatabase(self.prac)
@@ -88,17 +84,13 @@ class RolesTransformation(PRACModule):
             if params.get('project', None) is None:
                 logger.debug('Loading Project: {}.pracmln'.format(colorize(actioncore, (None, 'cyan', True), True)))
                 projectpath = os.path.join(pracloc.pracmodules, self.name, '{}Transformation.pracmln'.format(actioncore))
-                project = MLNProject.open(projectpath)
+                project = self.load_project(projectpath)
             else:
                 logger.debug(colorize('Loading Project from params', (None, 'cyan', True), True))
                 projectpath = os.path.join(params.get('projectpath', None) or os.path.join(pracloc.pracmodules, self.name), params.get('project').name)
                 project = params.get('project')
     
-            mlntext = project.mlns.get(project.queryconf['mln'], None)
-            mln = parse_mln(mlntext, searchpaths=[self.module_path],
-                            projectpath=projectpath,
-                            logic=project.queryconf.get('logic', 'FirstOrderLogic'),
-                            grammar=project.queryconf.get('grammar', 'PRACGrammar'))
+            mln = self.project_mln(project, projectpath)
             result_db = None
                 
             for pdb in node.parent.outdbs:
@@ -138,7 +130,7 @@ class RolesTransformation(PRACModule):
             roles = self.prac.actioncores[actioncore].roles
             for atom, truth in sorted(result_db.evidence.iteritems()):
                 if any(r in atom for r in roles):
-                    _, predname, args = self.prac.mln.logic.parse_literal(atom)
+                    _, predname, args = parse_literal(atom, self.prac.mln.logic)
                     word, ac = args
                     if ac == actioncore:
                         r_db << (atom, truth)
@@ -160,8 +152,7 @@ class RolesTransformation(PRACModule):
                 r_db_ << (atom, truth)
             infstep.outdbs.append(r_db_)
     
-            pngs['RolesTransformation - ' + str(i)] = get_cond_prob_png(project.queryconf.get('queries', ''), dbs,
-                                                                        filename=self.name)
-            infstep.png = pngs
+            infstep.add_png('RolesTransformation - ' + str(i), get_cond_prob_png,
+                            project.queryconf.get('queries', ''), dbs, filename=self.name)
             infstep.applied_settings = project.queryconf.config
         return [node]
@@ -21,14 +21,17 @@
 # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import argparse
 import os
-from collections import defaultdict
+import time
+from collections import OrderedDict, defaultdict
 
 from dnutils import logs
 from nltk.corpus.reader.wordnet import Synset
 
 from prac.core.base import PRACModule, PRACPIPE, DB_TRANSFORM
 from prac.core.inference import PRACInferenceStep
+from prac.core.simmatrix import SimilarityMatrix
 from prac.core.wordnet import WordNet, POS_MAP
 
 from pracmln import MLN, Database
@@ -38,6 +41,38 @@ from pracmln.mln.util import colorize, mergedom
 logger = logs.getlogger(__name__, logs.INFO)
 
 
+def sense_evidence(word2senses, unknown, domain):
+    '''
+    Generates the negative sense evidence of a sentence: No word has any of
+    the senses of the other words, except for the ones it shares with them,
+    and the words without any senses have none of the senses in ``domain``
+    or of the other words.
+
+    Every atom is generated once, in time linear in the number of resulting
+    atoms.
+
+    :param word2senses:     an ordered dictionary mapping the words to the
+                            lists of their possible senses
+    :param unknown:         the words that have no senses
+    :param domain:          the sense domain of the database
+    :return:                a generator of ``!has_sense`` atoms
+    '''
+    allsenses = list(OrderedDict.fromkeys(s for senses in word2senses.values() for s in senses))
+    for word, senses in word2senses.items():
+        own = set(senses)
+        prefix = '!has_sense({},'.format(word)
+        for s in allsenses:
+            if s not in own:
+                yield prefix + s + ')'
+    # the senses of the known words are added to the domain by their
+    # negative evidence before the unknown words are processed
+    domain = list(OrderedDict.fromkeys(list(domain) + allsenses))
+    for word in unknown:
+        prefix = '!has_sense({},'.format(word)
+        for s in domain:
+            yield prefix + s + ')'
+
+
 class WNSenses(PRACModule):
     '''
     Extracts possible word senses from WordNet given the part of speech
@@ -49,10 +84,27 @@ class WNSenses(PRACModule):
                        logic='FuzzyLogic',
                        grammar='PRACGrammar')
         self.wordnetKBs = {}
+        self.simmatrix = SimilarityMatrix.load()
+        if self.simmatrix is not None and self.simmatrix.simtype != 'path':
+            self.simmatrix = None
+
+
+    def similarities(self, synsets, concepts):
+        '''
+        Returns the matrix of the path similarities of ``synsets`` and the
+        concepts with the names ``concepts``. The values are read from the
+        precomputed similarity matrix (see ``pracsimmatrix``) if it is
+        available and contains all of them, and computed in WordNet otherwise.
+        '''
+        if self.simmatrix is not None:
+            sims = self.simmatrix.submatrix([s.name() for s in synsets], concepts)
+            if sims is not None:
+                return sims
+        return self.prac.wordnet.similarity_matrix(synsets, concepts, 'path')
 
 
     @DB_TRANSFORM
-    def get_senses_and_similarities(self, db, concepts):
+    def get_senses_and_similarities(self, db, concepts, cache=None):
         '''
         Returns a new database with possible senses and the pairwise
         semantic similarities asserted. Assumes the part-of-speeches
@@ -74,47 +126,44 @@ class WNSenses(PRACModule):
         NB: The existing databases are _not_ modified. Instead, copies
         of them are created and returned.
 
+        If a ``prac.core.inference.SenseCache`` is given (usually the
+        ``sensecache`` of the current ``PRACInference``), the senses and
+        similarities are taken from it, and only the missing ones are
+        computed and added to it.
+
         '''
         wordnet = self.prac.wordnet
-        word2senses = defaultdict(list)
+        word2senses = OrderedDict()
+        unknown = []
         db_ = db.copy(self.prac.mln)
+        # extract everything except the number (e.g. compound words like
+        # heart-shaped from heart-shaped-4)
+        words = [(res['?word'], '-'.join(res['?word'].split('-')[:-1]), POS_MAP.get(res['?pos'], None))
+                 for res in db.query('has_pos(?word,?pos)')]
+        keys = [(word, pos) for _, word, pos in words if pos is not None]
+        if cache is not None:
+            word2synsets = cache.synsets(keys, wordnet.synsets_many)
+        else:
+            word2synsets = wordnet.synsets_many(keys)
 
-        for res in db.query('has_pos(?word,?pos)'):
-            word_const = res['?word']
-            pos = POS_MAP.get(res['?pos'], None)
-            # if no possible sense can be determined by WordNet, skip word
-            # for now. False senses will be asserted later
-            if pos is None:
-                continue
-            # extract everything except the number (e.g. compound words like
-            # heart-shaped from heart-shaped-4)
-            word = '-'.join(word_const.split('-')[:-1])
-            for i, synset in enumerate(wordnet.synsets(word, pos)):
-                sense_id = synset.name()
-                word2senses[word_const].append(sense_id)
-                for concept in concepts:
-                    sim = wordnet.similarity(synset, concept, 'path')
-                    db_ << ('is_a({},{})'.format(sense_id, concept), sim)
-
-        for word in word2senses:
-            for word2, senses in word2senses.iteritems():
-                if word2 == word:
-                    continue
-                else:
-                    for s in senses:
-                        if not s in word2senses[word]:
-                            db_ << '!has_sense({},{})'.format(word, s)
-
-        # assert false for combinations of possible senses and
-        # words without POS tag
-        for res in db.query('has_pos(?word,?pos)'):
-            word_const = res['?word']
-            pos = POS_MAP.get(res['?pos'], None)
+        similarities = []
+        for word_const, word, pos in words:
             # if no possible sense can be determined by WordNet, assert false
             # for all possible senses
-            if pos is None or not wordnet.synsets('-'.join(word_const.split('-')[:-1]),pos):
-                for s in db_.domain('sense'):
-                    db_ << '!has_sense({},{})'.format(word_const, s)
+            if pos is None or not word2synsets[(word, pos)]:
+                unknown.append(word_const)
+                continue
+            synsets = word2synsets[(word, pos)]
+            if cache is not None:
+                sims = cache.similarities(synsets, concepts, self.similarities)
+            else:
+                sims = self.similarities(synsets, concepts).tolist()
+            word2senses[word_const] = [s.name() for s in synsets]
+            for synset, row in zip(synsets, sims):
+                similarities.extend(('is_a({},{})'.format(synset.name(), concept), sim)
+                                    for concept, sim in zip(concepts, row))
+        db_.add_all(similarities)
+        db_.add_all(sense_evidence(word2senses, unknown, list(db_.domain('sense'))))
         return db_
 
 
@@ -137,15 +186,15 @@ class WNSenses(PRACModule):
 
         db = db_.copy(self.prac.mln)
         mlndomains = mln.domains.get('concept', []) + db_.domains.get('concept', [])
-        for s in db_.domains['sense']:
-            sense = self.prac.wordnet.synset(s)
-            for c in mlndomains:
-                syn = self.prac.wordnet.synset(c)
+        senses = db_.domains['sense']
+        sims = self.similarities([self.prac.wordnet.synset(s) for s in senses], mlndomains)
+        for s, row in zip(senses, sims.tolist()):
+            for c, sim in zip(mlndomains, row):
                 # this is a workaround! use sense.name and syn.name instead of
                 # s and c, once misleading data is removed from mlns and dbs
                 # example:
                 # self.prac.wordnet.synset('make.v.39').name == 'cook.v.02'!
-                db << ('is_a(%s, %s)' % (s, c), self.prac.wordnet.similarity(sense, syn))
+                db << ('is_a(%s, %s)' % (s, c), sim)
         return db
 
 
@@ -175,15 +224,17 @@ class WNSenses(PRACModule):
         '''
         db_ = db.copy()
         dbdomains = db.domains
-        for cl in dbdomains.pop('cluster'):
-            for propkey in dbdomains:
-                if propkey not in mln.domains: continue
-                for propval in dbdomains[propkey]:
-                    for propval2 in mln.domains[propkey]:
-                        synset1 = self.prac.wordnet.synset(propval)
-                        synset2 = self.prac.wordnet.synset(propval2)
-                        sim = self.prac.wordnet.similarity(synset1, synset2,
-                                                           'wup')
+        clusters = dbdomains.pop('cluster')
+        sims = {}
+        for propkey in dbdomains:
+            if propkey not in mln.domains: continue
+            sims[propkey] = self.prac.wordnet.similarity_matrix(dbdomains[propkey],
+                                                                mln.domains[propkey],
+                                                                'wup').tolist()
+        for cl in clusters:
+            for propkey in sims:
+                for row in sims[propkey]:
+                    for propval2, sim in zip(mln.domains[propkey], row):
                         db_ << ('{}({}, {})'.format(propkey, cl, propval2),
                                 sim)
         return db_
@@ -293,13 +344,8 @@ class WNSenses(PRACModule):
                     for concept in db.mln.domains['concept']:
                         sim = wordnet.semilarity(synset, concept)
                         db << ('is_a(%s,%s)' % (sense_id, concept), sim)
-            for word in word2senses:
-                for word2, senses in word2senses.iteritems():
-                    if word2 == word:
-                        continue
-                    else:
-                        for s in senses: db << (
-                            '!has_sense(%s,%s)' % (word, s))
+            for atom in sense_evidence(word2senses, [], []):
+                db << atom
 
 
     @PRACPIPE
@@ -330,3 +376,62 @@ class WNSenses(PRACModule):
             for dbfile in self.prac.training_dbs():
                 db = Database(self.mln, dbfile=dbfile, ignore_unknown_preds=True)
                 training_dbs.append(db)
+
+
+def _pairwise_sense_evidence(word2senses, unknown, domain):
+    # the former evidence generation, which is kept as a reference for the
+    # benchmark
+    atoms = []
+    for word in word2senses:
+        for word2, senses in word2senses.items():
+            if word2 == word:
+                continue
+            for s in senses:
+                if s not in word2senses[word]:
+                    atoms.append('!has_sense({},{})'.format(word, s))
+    for word in unknown:
+        for s in domain:
+            atoms.append('!has_sense({},{})'.format(word, s))
+    return atoms
+
+
+def benchmark(lengths=(10, 20, 40, 80, 160), senses=8, repeat=3):
+    '''
+    Measures the time needed to generate the negative sense evidence of
+    synthetic sentences of increasing lengths, with and without the
+    set-based ``sense_evidence()``. Every word occurs twice in a sentence
+    and has ``senses`` senses, one of which it shares with another word.
+    Every tenth word has no senses.
+
+    :return:    a list of (length, #atoms, seconds pairwise, seconds set-based)
+                tuples
+    '''
+    results = []
+    for length in lengths:
+        word2senses = OrderedDict()
+        unknown = []
+        for i in range(length):
+            word = 'word-{}'.format(i + 1)
+            if i % 10 == 9:
+                unknown.append(word)
+            else:
+                lemma = i % max(1, length // 2)
+                word2senses[word] = ['sense.n.{:02d}-{}'.format(k, lemma) for k in range(senses - 1)] + ['shared.n.{}'.format(lemma // 2)]
+        domain = list(OrderedDict((s, None) for ss in word2senses.values() for s in ss))
+        times = []
+        for generate in (_pairwise_sense_evidence, sense_evidence):
+            start = time.time()
+            for _ in range(repeat):
+                atoms = list(generate(word2senses, unknown, domain))
+            times.append((time.time() - start) / repeat)
+        results.append((length, len(set(atoms)), times[0], times[1]))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the generation of the negative sense evidence.')
+    parser.add_argument('--lengths', '-l', dest='lengths', type=int, nargs='+', default=[10, 20, 40, 80, 160], help='The numbers of words of the sentences.')
+    parser.add_argument('--senses', '-s', dest='senses', type=int, default=8, help='The number of senses per word.')
+    args = parser.parse_args()
+    for length, atoms, pairwise, setbased in benchmark(args.lengths, args.senses):
+        print('{:>4d} words, {:>7d} atoms: {:8.4f}s pairwise, {:8.4f}s set-based'.format(length, atoms, pairwise, setbased))
@@ -151,6 +151,9 @@ class Node(object):
     def __eq__(self, other):
         return self.id == other.id
 
+    def __hash__(self):
+        return hash(self.id)
+
     
     
 class DAG(object):
@@ -0,0 +1,105 @@
+# PRAC -- IMPORT-TIME BUDGET
+#
+# (C) 2016 by Daniel Nyga (nyga@cs.uni-bremen.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import argparse
+import os
+import subprocess
+import sys
+
+
+# the modules loaded by ``import prac`` and the command-line tools
+MODULES = ['prac', 'pracquery', 'pracparse', 'practell', 'pracparsecache',
+           'pracsimmatrix', 'senses', 'pracxfold', 'prac.core.wnstore']
+
+# directory containing the ``prac`` package and the command-line tools
+BASEDIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+TIMER = 'import time; t = time.time(); import {0}; print(time.time() - t)'
+
+
+def import_time(module, importtime=True):
+    '''
+    Imports ``module`` in a fresh interpreter and measures how long it takes.
+
+    :param module:      the name of the module
+    :param importtime:  whether or not the cumulative import times of the
+                        individual modules are recorded by ``-X importtime``
+                        (Python 3.7 and later)
+    :return:            the import time of ``module`` in seconds and a list
+                        of (module, seconds) tuples of all imported modules
+    '''
+    cmd = [sys.executable]
+    if importtime:
+        cmd += ['-X', 'importtime']
+    cmd += ['-c', TIMER.format(module)]
+    p = subprocess.Popen(cmd, cwd=BASEDIR, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                         universal_newlines=True)
+    out, err = p.communicate()
+    if p.returncode != 0:
+        raise Exception('could not import {}:\n{}'.format(module, err))
+    modules = []
+    for line in err.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) == 3 and fields[1].strip().isdigit():
+            modules.append((fields[2].strip(), int(fields[1]) / 1e6))
+    return float(out.strip().splitlines()[-1]), modules
+
+
+def check(modules=None, budget=2., top=5):
+    '''
+    Measures the import times of ``modules`` and prints them together with
+    the ``top`` heaviest modules they import.
+
+    :param modules:     the names of the modules. Defaults to ``MODULES``.
+    :param budget:      the maximal import time per module in seconds
+    :return:            the list of modules exceeding the budget
+    '''
+    importtime = sys.version_info >= (3, 7)
+    exceeded = []
+    for module in modules or MODULES:
+        seconds, imported = import_time(module, importtime)
+        print('{:<20s} {:8.3f} s{}'.format(module, seconds, '  OVER BUDGET' if seconds > budget else ''))
+        heaviest = sorted([(m, s) for m, s in imported if m != module], key=lambda x: -x[1])
+        for name, s in heaviest[:top]:
+            print('    {:<32s} {:8.3f} s'.format(name, s))
+        if seconds > budget:
+            exceeded.append(module)
+    return exceeded
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the import times of PRAC and its command-line tools against a budget.')
+    parser.add_argument('modules', nargs='*', help='The modules to be checked. Defaults to prac and all command-line tools.')
+    parser.add_argument('--budget', '-b', dest='budget', type=float, default=2., help='The maximal import time per module in seconds.')
+    parser.add_argument('--top', '-t', dest='top', type=int, default=5, help='The number of heaviest imports to be shown per module.')
+    args = parser.parse_args()
+    exceeded = check(args.modules, budget=args.budget, top=args.top)
+    if exceeded:
+        print('import budget of {} s exceeded by: {}'.format(args.budget, ', '.join(exceeded)))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
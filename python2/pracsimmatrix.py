@@ -0,0 +1,70 @@
+'''
+Created on Oct 18, 2016
+
+@author: nyga
+'''
+import argparse
+import glob
+import os
+
+from nltk import word_tokenize
+from pracmln.mln.base import parse_mln
+from pracmln.utils.project import MLNProject
+
+from prac.core import locations as praclocations
+from prac.core.base import PRAC
+from prac.core.simmatrix import SimilarityMatrix, default_path
+from pracparsecache import read_sentences
+
+
+def project_concepts():
+    '''
+    Returns the set of all constants of the ``concept`` domains of the MLNs
+    of all PRAC module projects.
+    '''
+    concepts = set()
+    for projectpath in sorted(glob.glob(os.path.join(praclocations.pracmodules, '*', '*.pracmln'))):
+        project = MLNProject.open(projectpath)
+        for name, mlntext in project.mlns.iteritems():
+            mln = parse_mln(mlntext, searchpaths=[os.path.dirname(projectpath)],
+                            projectpath=projectpath,
+                            logic=project.queryconf.get('logic', 'FuzzyLogic'),
+                            grammar=project.queryconf.get('grammar', 'PRACGrammar'))
+            concepts.update(mln.domains.get('concept', []))
+    concepts.discard('null')
+    return concepts
+
+
+def vocabulary_senses(wordnet, sentences):
+    '''
+    Returns the names of all synsets of the words in ``sentences`` for all
+    parts of speech.
+    '''
+    senses = set()
+    for s in sentences:
+        for word in word_tokenize(s):
+            for pos in ('n', 'v', 'a'):
+                senses.update(syn.name() for syn in wordnet.synsets(word, pos))
+    return senses
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute the similarities of word senses and the concepts of the PRAC models.')
+    parser.add_argument('paths', nargs='*', help='JSON files with lists of sentences or howto directories whose vocabulary is to be covered.')
+    parser.add_argument('--recursive', '-r', dest='recursive', action='store_true', default=False, help='Descend into subdirectories of howto directories.')
+    parser.add_argument('--output', '-o', dest='output', default=default_path(), help='The file the similarity matrix is stored in. Defaults to %(default)s.')
+    args = parser.parse_args()
+
+    prac = PRAC()
+    concepts = project_concepts()
+    senses = vocabulary_senses(prac.wordnet, [s for path in args.paths for s in read_sentences(path, args.recursive)])
+    # the concepts themselves may also be senses of words
+    senses.update(concepts)
+    print('Computing the similarities of {} senses and {} concepts...'.format(len(senses), len(concepts)))
+    matrix = SimilarityMatrix.build(prac.wordnet, senses, concepts)
+    matrix.save(args.output)
+    print('Stored the similarity matrix in {}'.format(args.output))
+
+
+if __name__ == '__main__':
+    main()
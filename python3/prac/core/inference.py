@@ -22,9 +22,10 @@
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
 from collections import defaultdict
+from functools import partial
+from threading import RLock
 
 from dnutils import logs, out
-from graphviz.dot import Digraph
 
 from prac.db.ies.models import Object, Frame, Word
 from prac.pracutils import StopWatch
@@ -56,6 +57,37 @@ class PRACInferenceStep(object):
         self.node.infchain.append(self)
         self.outdbs = []
         self.watch = StopWatch()
+        self._pngs = {}
+
+
+    def add_png(self, name, render, *args, **kwargs):
+        '''
+        Registers a visualization of this step, which is rendered by calling
+        ``render(*args, **kwargs)`` when ``png`` is accessed for the first
+        time. Nothing is registered unless ``PRAC.render_pngs`` is set.
+
+        :param name:    the title of the visualization
+        :param render:  a function returning the png, e.g. ``get_cond_prob_png``
+        '''
+        if self.node.pracinfer.prac.render_pngs:
+            self._pngs[name] = partial(render, *args, **kwargs)
+
+
+    @property
+    def png(self):
+        '''
+        A dictionary mapping the titles of the visualizations of this step
+        to their pngs, which are rendered on demand.
+        '''
+        for name, png in list(self._pngs.items()):
+            if isinstance(png, partial):
+                self._pngs[name] = png()
+        return self._pngs
+
+
+    @png.setter
+    def png(self, pngs):
+        self._pngs = dict(pngs)
 
 
 
@@ -219,6 +251,69 @@ class FrameNode(PRACInferenceNode):
         return self.frame.repstr()
 
 
+class SenseCache(object):
+    '''
+    The word senses and semantic similarities determined during a single
+    inference, which are shared by all modules asserting them as evidence.
+
+    The senses are stored per word and part of speech, and the similarities
+    per sense and concept, such that a module, whose concept domain differs
+    from the ones of the modules before, computes only the similarities of
+    the concepts that are new to it.
+    '''
+
+    def __init__(self):
+        self.senses = {}
+        self.sims = defaultdict(dict)
+        self._lock = RLock()
+
+
+    def synsets(self, words, compute):
+        '''
+        Returns the synsets of the given words.
+
+        :param words:      a list of (word, pos) tuples
+        :param compute:    a function mapping a list of (word, pos) tuples
+                           to a dictionary of their lists of synsets, which is
+                           called for the words that are not cached yet.
+        :return:           a dictionary mapping the (word, pos) tuples to
+                           their lists of synsets.
+        '''
+        with self._lock:
+            missing = [w for w in set(words) if w not in self.senses]
+            if missing:
+                self.senses.update(compute(missing))
+            return {w: self.senses[w] for w in words}
+
+
+    def similarities(self, synsets, concepts, compute):
+        '''
+        Returns the similarities of all pairs of ``synsets`` and ``concepts``
+        as a list of rows.
+
+        :param synsets:     a list of synsets
+        :param concepts:    a list of concept names
+        :param compute:     a function mapping a list of synsets and a list of
+                            concept names to the matrix of their similarities,
+                            which is called once for all pairs that are not
+                            cached yet.
+        '''
+        with self._lock:
+            rows = [self.sims[s.name()] for s in synsets]
+            missing = [s for s, row in zip(synsets, rows) if any(c not in row for c in concepts)]
+            if missing:
+                cols = sorted(set(c for s in missing for c in concepts if c not in self.sims[s.name()]))
+                for s, values in zip(missing, compute(missing, cols).tolist()):
+                    self.sims[s.name()].update(zip(cols, values))
+            return [[row[c] for c in concepts] for row in rows]
+
+
+    def clear(self):
+        with self._lock:
+            self.senses.clear()
+            self.sims.clear()
+
+
 class PRACInference(object):
     '''
     Represents an inference chain in PRAC
@@ -234,6 +329,7 @@ class PRACInference(object):
         self.prac = prac
         prac.deinit_modules()
         self.watch = StopWatch()
+        self.sensecache = SenseCache()
         if type(instr) in {list, tuple}:
             instr_ = instr
         elif isinstance(instr, str):
@@ -339,6 +435,7 @@ class PRACInference(object):
                     if predname in self.prac.roles.union(['has_sense', 'action_core', 'achieved_by']):
                         finaldb << atom
                     #         finaldb.write(sys.stdout, color=True)
+        from graphviz.dot import Digraph
         g = Digraph(format='svg', engine='dot')
         g.attr('node', shape='box', style='filled')
         for res in finaldb.query('action_core(?w, ?a) ^ has_sense(?w, ?s)'):
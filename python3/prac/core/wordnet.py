@@ -21,26 +21,28 @@
 # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 
+import bisect
 import itertools
 import re
 from itertools import chain
-from scipy import spatial
+import numpy as np
 from threading import RLock
 
-import graphviz as gv
 from dnutils import logs
 from num2words import num2words
 from word2number import w2n
 
 from prac.core.errors import ConceptAlreadyExistsError, NoRationalNumberError
+from prac.core.wnindex import taxonomy_index
+from prac.core.wnstore import wordnet_store
+from prac.core.wntaxonomy import concept_taxonomy
 from prac.pracutils import properties
-from prac.pracutils.graph import DAG, Node
+from prac.pracutils.graph import Node
 from prac.pracutils.pracgraphviz import render_gv
-from prac.pracutils.utils import synchronized
+from prac.pracutils.utils import synchronized, LRUCache
 from nltk.corpus import wordnet
 from nltk.corpus.reader.wordnet import Synset
-from pracmln.utils.graphml import Graph, Node as GMLNode, Edge
-from nltk.stem import WordNetLemmatizer
+from nltk.corpus.util import LazyCorpusLoader
 
 
 logger = logs.getlogger(__name__, logs.INFO)
@@ -65,9 +67,182 @@ for c in NUMBER_TAGS:
     POS_MAP[c] = 'c'
 
 
-colorsims = {}
-shapesims = {}
-sizesims = {}
+class SimilarityTable(object):
+    '''
+    Pairwise similarities of a fixed set of names, which are stored in a
+    NumPy array together with a mapping from the names to their indices.
+
+    For compatibility, the table can be used like the nested dictionary
+    ``{name1: {name2: similarity}}``.
+    '''
+
+    def __init__(self):
+        self._table = ({}, np.zeros((0, 0)))
+
+
+    def assign(self, names, matrix):
+        '''
+        Replaces the similarities by ``matrix``, whose rows and columns
+        correspond to ``names``.
+        '''
+        # the index and the matrix are swapped together, since the tables
+        # are read without locking
+        self._table = ({n: i for i, n in enumerate(names)}, matrix)
+
+
+    def similarity(self, name1, name2):
+        index, matrix = self._table
+        return float(matrix[index[name1], index[name2]])
+
+
+    def __contains__(self, name):
+        return name in self._table[0]
+
+
+    def __getitem__(self, name):
+        index, matrix = self._table
+        row = matrix[index[name]]
+        return {n: float(row[i]) for n, i in index.items()}
+
+
+    def __iter__(self):
+        return iter(self._table[0])
+
+
+    def __len__(self):
+        return len(self._table[0])
+
+
+    def keys(self):
+        return list(self._table[0])
+
+
+colorsims = SimilarityTable()
+shapesims = SimilarityTable()
+sizesims = SimilarityTable()
+
+readerlock = RLock()
+
+# memoized similarities of pairs of synsets, shared by all WordNet instances
+simcache = LRUCache(maxsize=100000)
+# memoized hypernym paths of single synsets
+pathcache = LRUCache(maxsize=10000)
+# memoized subtree heights of the synsets in the full WordNet taxonomy
+fullheights = {}
+# memoized synsets of number strings
+numbercache = LRUCache(maxsize=1000)
+# memoized synsets and lemmas of words
+lookupcache = LRUCache(maxsize=50000)
+
+
+def _guard_corpus_reader():
+    '''
+    Serializes the reads from the data files of the NLTK WordNet corpus
+    reader. The reader shares one file handle per POS among all threads,
+    so concurrent seek() and readline() calls would interfere with each
+    other. Synsets that have been read once are served from the reader's
+    cache without locking.
+
+    The corpus is not loaded here, since most queries are answered by the
+    WordNet store. If it has not been loaded yet, its loading is serialized
+    and the guard is installed as soon as it is loaded.
+    '''
+    with readerlock:
+        if isinstance(wordnet, LazyCorpusLoader):
+            if '_LazyCorpusLoader__load' not in wordnet.__dict__:
+                load = wordnet._LazyCorpusLoader__load
+
+                def guarded_load():
+                    with readerlock:
+                        if isinstance(wordnet, LazyCorpusLoader):
+                            load()
+                        _guard_corpus_reader()
+                wordnet._LazyCorpusLoader__load = guarded_load
+            return
+        if wordnet.__dict__.get('_prac_guarded', False): return
+        for name in ('synset_from_pos_and_offset', '_synset_from_pos_and_offset'):
+            if hasattr(wordnet, name):
+                setattr(wordnet, name, _cached_or_synchronized(getattr(wordnet, name)))
+        wordnet._prac_guarded = True
+
+
+def _cached_or_synchronized(read):
+    '''
+    Wraps the reader method ``read(pos, offset)`` such that synsets in the
+    reader's offset cache are returned immediately, and all others are read
+    while holding ``readerlock``.
+    '''
+    cache = getattr(wordnet, '_synset_offset_cache', None)
+
+    def guarded(pos, offset):
+        if cache is not None:
+            synset = cache[pos].get(offset)
+            if synset is not None:
+                return synset
+        with readerlock:
+            return read(pos, offset)
+    return guarded
+
+
+def _simkey(synset1, synset2, *args):
+    '''
+    Returns the key of the pair of synsets in the similarity cache, or
+    ``None`` if their similarity must not be cached, since generated number
+    synsets cannot be told apart by their names.
+    '''
+    if isinstance(synset1, RationalNumberSynset) or isinstance(synset2, RationalNumberSynset):
+        return None
+    return (synset1.name(), synset2.name()) + args
+
+
+def _index_of(*synsets):
+    '''
+    Returns the taxonomy index if it contains all of the given synsets, or
+    ``None`` otherwise.
+    '''
+    if any(isinstance(s, RationalNumberSynset) for s in synsets):
+        return None
+    index = taxonomy_index()
+    if all(s.name() in index for s in synsets):
+        return index
+    return None
+
+
+class NumberIndex(object):
+    '''
+    The known numbers of WordNet sorted by their values, such that the
+    closest one to a given number can be found by bisection.
+
+    If several synsets have the same value, the first one in ``numbers``
+    is used.
+    '''
+
+    def __init__(self, numbers):
+        '''
+        :param numbers:     a dictionary mapping synset names to numbers
+        '''
+        first = {}
+        for rank, (name, value) in enumerate(numbers.items()):
+            if value not in first:
+                first[value] = (rank, name)
+        self.values = sorted(first)
+        self.ranks = [first[v][0] for v in self.values]
+        self.names = [first[v][1] for v in self.values]
+
+
+    def closest(self, number):
+        '''
+        Returns the name of the synset whose value is closest to ``number``
+        and the absolute difference of both. Ties are broken by the order of
+        the synsets in ``numbers``.
+        '''
+        i = bisect.bisect_left(self.values, number)
+        j = min([j for j in (i - 1, i) if 0 <= j < len(self.values)],
+                key=lambda j: (abs(number - self.values[j]), self.ranks[j]))
+        return self.names[j], abs(number - self.values[j])
+
+
+numberindex = NumberIndex(properties.numbrs)
 
 
 class RationalNumberSynset(Synset):
@@ -133,14 +308,10 @@ class RationalNumberSynset(Synset):
 
         # find parent number with lowest difference to self.number
         if self.parent is None:
-            diff = float('inf')
-            for c in properties.numbrs:
-                d = abs(self.number - properties.numbrs[c])
-                if d == 0.0:
-                    raise ConceptAlreadyExistsError(self.number)
-                if d < diff:
-                    diff = d
-                    self.parent = wordnet.synset(c)
+            c, diff = numberindex.closest(self.number)
+            if diff == 0.0:
+                raise ConceptAlreadyExistsError(self.number)
+            self.parent = wordnet.synset(c)
 
         # generate synset from number
         self._definition = "Newly created concept of the number '{}' which " \
@@ -188,6 +359,14 @@ def number_synset(numstr):
                     represented by the given numstr or a newly generated
                     RationalNumberSynset
     '''
+    syn = numbercache.get(numstr)
+    if syn is None:
+        syn = _number_synset(numstr)
+        numbercache.put(numstr, syn)
+    return syn
+
+
+def _number_synset(numstr):
     # numstr is either a word or a number
     try:
         number = float(numstr)
@@ -214,17 +393,10 @@ def number_synset(numstr):
             raise NoRationalNumberError('{} is not a valid rational number!'.format(numstr))
 
     # find parent number with lowest difference to self.number
-    diff = float('inf')
-    syn = None
-
-    for c in properties.numbrs:
-        d = abs(number - properties.numbrs[c])
-        if d == 0.0:
-            return wordnet.synset(c)
-        if d < diff:
-            diff = d
-            syn = RationalNumberSynset(numstr, number, numtype, wordnet.synset(c))
-    return syn
+    c, diff = numberindex.closest(number)
+    if diff == 0.0:
+        return wordnet.synset(c)
+    return RationalNumberSynset(numstr, number, numtype, wordnet.synset(c))
 
 
 class WordNet(object):
@@ -235,6 +407,11 @@ class WordNet(object):
     
     Also provides a set of customized similarity measures for
     colors, shapes and sizes as introduced in Mareike's thesis.
+
+    The queries may be issued from multiple threads concurrently. Only
+    the (re-)initialization of the taxonomy and the similarity tables is
+    serialized by ``wordnetlock``; the new taxonomy is built aside and
+    swapped in once it is complete.
     '''
     wordnetlock = RLock()
 
@@ -247,13 +424,19 @@ class WordNet(object):
         :param concepts:    the concepts the concept taxonomy is to be
                             initialized with
         '''
+        _guard_corpus_reader()
+        self.taxonomy = None
         self.core_taxonomy = None
+        self._coreheights = (None, {})
         if concepts is not None:
             self.initialize_taxonomy(concepts)
-        self.initialize_csimilarities(properties.chrcolorspecs, properties.achrcolorspecs)
-        self.initialize_similarities(shapesims, properties.shapespecs)
-        self.initialize_similarities(sizesims, properties.sizespecs)
-        self.lemmatizer = WordNetLemmatizer()
+        # the tables are shared by all instances and computed only once
+        if not len(colorsims):
+            self.initialize_csimilarities(properties.chrcolorspecs, properties.achrcolorspecs)
+        if not len(shapesims):
+            self.initialize_similarities(shapesims, properties.shapespecs)
+        if not len(sizesims):
+            self.initialize_similarities(sizesims, properties.sizespecs)
 
 
     @synchronized(wordnetlock)
@@ -262,22 +445,18 @@ class WordNet(object):
         Calculates the Euclidean distance of the values of the specs
         entries and normalizes them.
 
-        :param simdct:  stores the results of the calculations
+        :param simdct:  the ``SimilarityTable`` storing the results of the
+                        calculations
         :param specs:   contains the numeric representations of the respective
                         specifications
         '''
+        names = list(specs.keys())
+        values = np.array([specs[k] for k in names], dtype=np.float64).reshape(len(names), -1)
         # calculate euclidean distance between values
-        maxdist = 0.
-        for k in list(specs.keys()):
-            simdct[k] = {}
-            for c in list(specs.keys()):
-                simdct[k][c] = spatial.distance.euclidean(specs[k], specs[c])
-                maxdist = max(maxdist, simdct[k][c])
-
+        from scipy.spatial.distance import cdist
+        dists = cdist(values, values)
         # normalize
-        for x in simdct:
-            for y in simdct:
-                simdct[x][y] = 1 - (simdct[x][y] / maxdist)
+        simdct.assign(names, 1 - dists / dists.max())
 
 
     @synchronized(wordnetlock)
@@ -292,30 +471,25 @@ class WordNet(object):
         :param achrspecs:   contains the HSV representations of the achromatic
                             colors
         '''
-        maxdist = 0.
         tempdict = dict(list(specs.items()) + list(achrspecs.items()))
-        for k in list(tempdict.keys()):
-            colorsims[k] = {}
-            for c in list(tempdict.keys()):
-                if k == c:  # same color
-                    colorsims[k][c] = 0.0
-                # one chromatic, one achromatic
-                elif not (k in specs and c in specs) and not (k in achrspecs and c in achrspecs):
-                    colorsims[k][c] = 130.
-                # colors on different halves of the hue-circle
-                elif abs(tempdict[k][0] - tempdict[c][0]) > 180:
-                    a = [(tempdict[k][0] + 180) % 360, tempdict[k][1], tempdict[k][2]]
-                    b = [(tempdict[c][0] + 180) % 360, tempdict[c][1], tempdict[c][2]]
-                    colorsims[k][c] = spatial.distance.euclidean(a, b)
-                else:
-                    colorsims[k][c] = spatial.distance.euclidean(tempdict[k], tempdict[c])
-                maxdist = max(maxdist, colorsims[k][c])
-
+        names = list(tempdict.keys())
+        hsv = np.array([tempdict[k] for k in names], dtype=np.float64)
+        from scipy.spatial.distance import cdist
+        dists = cdist(hsv, hsv)
+        # colors on different halves of the hue-circle
+        shifted = hsv.copy()
+        shifted[:, 0] = (shifted[:, 0] + 180) % 360
+        opposite = np.abs(hsv[:, 0, None] - hsv[None, :, 0]) > 180
+        dists[opposite] = cdist(shifted, shifted)[opposite]
+        # one chromatic, one achromatic
+        chromatic = np.array([k in specs for k in names])
+        achromatic = np.array([k in achrspecs for k in names])
+        mixed = ~((chromatic[:, None] & chromatic[None, :]) | (achromatic[:, None] & achromatic[None, :]))
+        dists[mixed] = 130.
+        # same color
+        np.fill_diagonal(dists, 0.)
         # normalize
-        for x in colorsims:
-            for y in colorsims:
-                temp = 1 - (colorsims[x][y] / maxdist)
-                colorsims[x][y] = temp
+        colorsims.assign(names, 1 - dists / dists.max())
 
 
     @synchronized(wordnetlock)
@@ -323,86 +497,52 @@ class WordNet(object):
         '''
         Creates a new taxonomy given a set of concepts, which is a subset
         of the WordNet taxonomy. 
+
+        The taxonomy is shared with all other instances using the same
+        concepts, and it is stored in the user data directory, such that
+        it only needs to be built once.
         
         :param concepts:     a list of concept names that should be used
                              for constructing the new taxonomy.
         :param collapse:     (bool) if True, all subpaths with only one 
                              child and parent are collapsed.
         '''
-        entity_name = 'entity.n.01'
-        self.core_taxonomy = DAG(root=Node(entity_name, entity_name))
-        self.known_concepts = {entity_name: self.core_taxonomy.root}
         if concepts is None:
+            entity_name = 'entity.n.01'
+            self.taxonomy = None
             self.core_taxonomy = None
-        else:
-            for direction in ('down', 'up'):
-                for concept in concepts:
-                    if concept == 'null': continue
-                    synset = wordnet.synset(concept)
-                    paths = synset.hypernym_paths()
-                    for path in paths:
-                        if not path[0].name() in self.known_concepts:
-                            if direction == 'up':
-                                self.known_concepts[path[-1].name()] = Node(
-                                    path[-1].name(), path[-1].name())
-                            continue
-                        if direction == 'up':
-                            path = list(reversed(path))
-                        first = self.known_concepts[path[0].name()]
-                        self.__extend_taxonomy_graph(first, path[1:],
-                                                     direction=direction)
-            # collapse the taxonomy
-            if not collapse: return
-            queue = list(self.core_taxonomy.root.children)
-            while len(queue) > 0:
-                node = queue.pop()
-                if collapse:
-                    # we keep the current node if it is a leaf or a fork
-                    # (zero or more than one children)
-                    keepThisNode = not (
-                        len(node.children) == 1 and len(node.parents) == 1)
-                    for c in node.children:
-                        keepThisNode |= len(c.parents) > 1
-                    if not keepThisNode:
-                        del self.known_concepts[node.data]
-                        for p in node.parents:
-                            p.children.remove(node)
-                            p.children.update(node.children)
-                        for c in node.children:
-                            c.parents.remove(node)
-                            c.parents.update(node.parents)
-                queue.extend(node.children)
+            self.known_concepts = {entity_name: Node(entity_name, entity_name)}
+            self._coreheights = (self.known_concepts, {})
+            return
+        self.__set_taxonomy(concept_taxonomy(concepts, collapse))
 
 
     @synchronized(wordnetlock)
-    def __extend_taxonomy_graph(self, concept, synset_path, direction):
+    def add_concepts(self, concepts):
         '''
-        Takes a node of the taxonomy graph and a hypernymy path
-        of a concept and extends the graph with the given path.
-        
-        :param concept:     (Node) concept node to be extended (the root in most
-                            cases)
-        :param synset_path: a path as it is return by Synset.hypernym_paths(),
-                            for instance.
+        Extends the taxonomy by the given concepts. Only the hypernym paths
+        of the concepts that are not yet known are computed.
+
+        :param concepts:     a list of concept names to be added.
         '''
-        if len(synset_path) == 0:
+        if self.taxonomy is None:
+            self.initialize_taxonomy(concepts)
             return
-        synset = synset_path[0]
-        if synset.name() not in self.known_concepts:
-            node = Node(synset.name(), synset.name())
-            self.known_concepts[synset.name()] = node
-        else:
-            node = self.known_concepts[synset.name()]
-        if direction == 'down':
-            concept.addChild(node)
-        elif direction == 'up':
-            concept.addParent(node)
-        else:
-            raise Exception('Unkown direction: {}'.format(direction))
-        self.__extend_taxonomy_graph(node, synset_path[1:], direction)
+        concepts = self.taxonomy.concepts.union(concepts)
+        self.__set_taxonomy(concept_taxonomy(concepts, self.taxonomy.collapse, base=self.taxonomy))
+
+
+    def __set_taxonomy(self, taxonomy):
+        core_taxonomy, known_concepts = taxonomy.graph()
+        # the readers do not lock, so the new taxonomy is built aside and
+        # swapped in as a whole. The subtree heights of the previous
+        # taxonomy are discarded.
+        self._coreheights = (known_concepts, {})
+        self.taxonomy = taxonomy
+        self.known_concepts = known_concepts
+        self.core_taxonomy = core_taxonomy
 
 
-    @synchronized(wordnetlock)
     def synsets(self, word, pos):
         '''
         Returns the set of synsets from NLTK.
@@ -412,18 +552,51 @@ class WordNet(object):
         '''
         if pos not in NLTK_POS:
             logger.exception('Unknown POS tag: {}'.format(pos))
-
         # special treatment for numbers
         if pos == 'c':
-            synsets = number_synsets(word)
-        else:
-            synsets = wordnet.synsets(word, pos)
-            if self.core_taxonomy is not None:
-                synsets = [s for s in synsets if s.name() in self.known_concepts]
-        return synsets
+            key = ('synsets', word, pos)
+            synsets = lookupcache.get(key)
+            if synsets is None:
+                synsets = tuple(number_synsets(word))
+                lookupcache.put(key, synsets)
+            return list(synsets)
+        return [wordnet.synset(name) for name in self.synset_names(word, pos)]
+
+
+    def synset_names(self, word, pos):
+        '''
+        Returns the names of the synsets of ``word``, which are looked up in
+        the WordNet store without loading the NLTK corpus.
+
+        :param word:     (string) the word to be queried.
+        :param pos:      (string) the NLTK POS tag.
+        '''
+        if pos == 'c':
+            return [s.name() for s in self.synsets(word, pos)]
+        # the synsets depend on the concepts of the taxonomy
+        taxonomy = self.taxonomy
+        key = ('names', word, pos, taxonomy.key if taxonomy is not None else None)
+        names = lookupcache.get(key)
+        if names is None:
+            names = wordnet_store().synset_names(word, pos)
+            if taxonomy is not None:
+                names = [n for n in names if n in taxonomy.cnodes]
+            names = tuple(names)
+            lookupcache.put(key, names)
+        return list(names)
+
+
+    def synsets_many(self, words):
+        '''
+        Returns the synsets of multiple words at once.
+
+        :param words:    an iterable of (word, pos) tuples.
+        :return:         a dictionary mapping the (word, pos) tuples to their
+                         lists of synsets.
+        '''
+        return {(word, pos): self.synsets(word, pos) for word, pos in set(words)}
 
 
-    @synchronized(wordnetlock)
     def synset(self, synset_id):
         '''
         Returns either the RationalNumberSynset or the NLTK synset for the
@@ -444,7 +617,37 @@ class WordNet(object):
                 raise e
 
 
-    @synchronized(wordnetlock)
+    def _memoized(self, key, compute, *args):
+        '''
+        Returns the similarity value stored in the similarity cache under
+        ``key``, or computes it by ``compute(*args)`` and stores it.
+        '''
+        if key is None:
+            return compute(*args)
+        value = simcache.get(key)
+        if value is None:
+            value = compute(*args)
+            simcache.put(key, value)
+        return value
+
+
+    def clear_caches(self):
+        '''
+        Discards all memoized similarities. Needs to be called whenever the
+        taxonomy changes.
+        '''
+        simcache.clear()
+        pathcache.clear()
+
+
+    def cache_stats(self):
+        '''
+        Returns the sizes and hit rates of the caches shared by all instances.
+        '''
+        return {'similarities': simcache.stats(), 'paths': pathcache.stats(),
+                'numbers': numbercache.stats(), 'lookups': lookupcache.stats()}
+
+
     def wup_similarity(self, synset1, synset2):
         '''
         Returns the WUP similariy of the two given synsets, which
@@ -457,11 +660,15 @@ class WordNet(object):
             synset2 = self.synset(synset2)
         if synset1 is None or synset2 is None:
             return 0.
+        return self._memoized(_simkey(synset1, synset2, 'wup_similarity'),
+                              self._wup_similarity, synset1, synset2)
+
+
+    def _wup_similarity(self, synset1, synset2):
         similarity = synset1.wup_similarity(synset2)
         return max(0.000, 0. if similarity is None else similarity)
 
 
-    @synchronized(wordnetlock)
     def path_similarity(self, synset1, synset2):
         '''
         Returns the WUP similariy of the two given synsets, which
@@ -474,12 +681,22 @@ class WordNet(object):
             synset2 = self.synset(synset2)
         if synset1 is None or synset2 is None:
             return 0.
+        return self._memoized(_simkey(synset1, synset2, 'path_similarity'),
+                              self._path_similarity, synset1, synset2)
+
 
-        similarity = synset1.path_similarity(synset2)
+    def _path_similarity(self, synset1, synset2):
+        index = _index_of(synset1, synset2)
+        # NLTK does not simulate a root node for nouns, so the distance
+        # is exactly the one in the index
+        if index is not None and synset1.pos() == synset2.pos() == 'n' and not synset1._needs_root():
+            distance = index.shortest_path_distance(synset1.name(), synset2.name())
+            similarity = None if distance is None else 1.0 / (distance + 1)
+        else:
+            similarity = synset1.path_similarity(synset2)
         return max(0.000, 0. if similarity is None else similarity)
 
 
-    @synchronized(wordnetlock)
     def lowest_common_hypernyms(self, synset, other, simulate_root=False,
                                 use_min_depth=False):
         '''
@@ -554,7 +771,6 @@ class WordNet(object):
             return []
 
 
-    @synchronized(wordnetlock)
     def flatten(self, iterable):
         '''
         Returns a generator of 1-dimensional list.
@@ -578,7 +794,6 @@ class WordNet(object):
                 yield item
 
 
-    @synchronized(wordnetlock)
     def unpacknoun(self, adjsyn):
         '''
         Returns the synsets of the derivationally related forms of the Lemmas
@@ -587,10 +802,9 @@ class WordNet(object):
                         is to be retrieved
         :return:        a one-dimensional list of synsets without duplicates
         '''
-        return list(set(self.flatten([drf.synset for drf in self.flatten([lemma.derivationally_related_forms() for lemma in adjsyn.lemmas])])))
+        return [wordnet.synset(name) for name in wordnet_store().derivationally_related(adjsyn.name())]
 
 
-    @synchronized(wordnetlock)
     def similarity(self, synset1, synset2, simtype='path'):
         '''
         Returns a custom semantic similarity for adjectives
@@ -606,33 +820,38 @@ class WordNet(object):
         similarity, which adds a penalizing factor for inferring
         another synset from adjectives.
         '''
-        posdiff = 0.
         if isinstance(synset1, str):
             synset1 = self.synset(str(synset1))
         if isinstance(synset2, str):
             synset2 = self.synset(str(synset2))
         if synset1 is None or synset2 is None:
             return 0.
+        return self._memoized(_simkey(synset1, synset2, simtype),
+                              self._similarity, synset1, synset2, simtype)
+
+
+    def _similarity(self, synset1, synset2, simtype):
+        posdiff = 0.
         if synset1 == synset2:
             return 1.0
 
         # separate check for color similarity
         if synset1.name() in colorsims and synset2.name() in colorsims:
-            return colorsims[synset1.name()][synset2.name()]
+            return colorsims.similarity(synset1.name(), synset2.name())
         elif synset1.name() in colorsims or synset2.name() in colorsims:
             # colors are maximially dissimilar to everything else
             return 0.
 
         # separate check for shape similarity
         if synset1.name() in shapesims and synset2.name() in shapesims:
-            return shapesims[synset1.name()][synset2.name()]
+            return shapesims.similarity(synset1.name(), synset2.name())
         elif synset1.name() in shapesims or synset2.name() in shapesims:
             # shapes are maximially dissimilar to everything else
             return 0.
 
         # separate check for size similarity
         if synset1.name() in sizesims and synset2.name() in sizesims:
-            return sizesims[synset1.name()][synset2.name()]
+            return sizesims.similarity(synset1.name(), synset2.name())
         elif synset1.name() in sizesims or synset2.name() in sizesims:
             # sizes are maximially dissimilar to everything else
             return 0.
@@ -662,21 +881,166 @@ class WordNet(object):
 
         # additional knowledge: if one synset is in the hypernym path of the
         # other, they are considered closely related
-        if self.syns_hyp_relation(synset1, synset2) > 0.:
-            return self.syns_hyp_relation(synset1, synset2)
+        hyprel = self.syns_hyp_relation(synset1, synset2)
+        if hyprel > 0.:
+            return hyprel
+
+        if simtype == 'path':
+            return self.path_similarity(synset1, synset2)
 
         # add additional knowledge: decrease similarity of synsets from
         # different taxonomy branches if not
         # synsInPreDefTaxonomyBranch(synset1, synset2): posdiff += .5
         posdiff += 1 - self.syns_taxonomy_branch_relation(synset1, synset2)
+        return self.wup(synset1, synset2, posdiff)
 
-        if simtype == 'path':
-            return self.path_similarity(synset1, synset2)
+
+    def similarity_matrix(self, synsets, concepts, simtype='path', measure=None):
+        '''
+        Returns the similarities of all pairs of ``synsets`` and ``concepts``
+        as a matrix, whose entry (i, j) is the similarity of ``synsets[i]``
+        and ``concepts[j]`` as it is returned by ``similarity``, or by
+        ``wup_similarity`` if ``simtype`` is ``wup_similarity``.
+
+        Synset ids are resolved only once per batch. The similarities of
+        nouns (and verbs for ``wup``) are computed by array operations on the
+        ancestors and depths in the taxonomy index, which are looked up once
+        per synset (see ``_indexed_similarities``). All other pairs are
+        computed one by one and share the results with all other similarity
+        queries.
+
+        :param synsets:     a list of synsets or synset ids
+        :param concepts:    a list of synsets or synset ids
+        :param simtype:     the similarity measure, ``path``, ``wup`` or
+                            ``wup_similarity``
+        :param measure:     a function computing the similarity of two
+                            synsets, which is used for all pairs instead of
+                            ``similarity``.
+        :return:            a NumPy array of shape
+                            ``(len(synsets), len(concepts))``
+        '''
+        resolved = {}
+
+        def resolve(synset):
+            if not isinstance(synset, str):
+                return synset
+            if synset not in resolved:
+                resolved[synset] = self.synset(synset)
+            return resolved[synset]
+
+        rows = [resolve(s) for s in synsets]
+        cols = [resolve(c) for c in concepts]
+        if measure is None:
+            matrix, done = self._indexed_similarities(rows, cols, simtype)
+            if simtype == 'wup_similarity':
+                measure = self.wup_similarity
+            else:
+                measure = lambda s1, s2: self.similarity(s1, s2, simtype)
         else:
-            return self.wup(synset1, synset2, posdiff)
+            matrix = np.zeros((len(rows), len(cols)))
+            done = np.zeros((len(rows), len(cols)), dtype=bool)
+        for i, j in zip(*np.nonzero(~done)):
+            matrix[i, j] = measure(rows[i], cols[j])
+        return matrix
+
+
+    def _indexed_similarities(self, rows, cols, simtype='path'):
+        '''
+        Computes the similarities of all pairs of ``rows`` and ``cols`` that
+        can be derived from the taxonomy index alone: the ``path`` and NLTK
+        ``wup_similarity`` of nouns and the ``wup`` similarity of nouns and
+        verbs. The verb similarities of NLTK simulate a root node, which is
+        not contained in the index, so they are left out.
+
+        Since the common hypernyms of two synsets are ancestors of the column
+        synset, all distances are stored over the ancestors of the columns
+        only, which are sorted such that the lowest common hypernym of two
+        synsets is the first ancestor they share. The distances of the
+        lowest common hypernyms to their ancestors are computed once they are
+        needed. The results are identical to the ones of ``similarity`` and
+        ``wup_similarity``.
+
+        :return:    the matrix of similarities and a boolean matrix of the
+                    same shape, which is ``True`` for all pairs that have
+                    been computed
+        '''
+        matrix = np.zeros((len(rows), len(cols)))
+        done = np.zeros((len(rows), len(cols)), dtype=bool)
+        nltk = simtype == 'wup_similarity'
+        pos = ('n', 'v') if simtype == 'wup' else ('n',)
+        index = taxonomy_index()
+
+        def indexed(synset):
+            if synset is None or isinstance(synset, RationalNumberSynset) or hasattr(synset, '__prac_syn'):
+                return False
+            name = synset.name()
+            if name not in index:
+                return False
+            if not nltk and (name in colorsims or name in shapesims or name in sizesims):
+                return False
+            return synset.pos() in pos and not (simtype != 'wup' and synset._needs_root())
+
+        rowids = [i for i, s in enumerate(rows) if indexed(s)]
+        colids = [j for j, c in enumerate(cols) if indexed(c)]
+        if not rowids or not colids:
+            return matrix, done
+        colnames = [cols[j].name() for j in colids]
+        # NLTK chooses the lowest common hypernym by the minimal depth
+        depth = index.min_depth if nltk else index.max_depth
+        names = sorted(set(a for n in set(colnames) for a in index.ancestors(n)), key=lambda n: (-depth(n), n))
+        ids = {n: k for k, n in enumerate(names)}
+        maxdepths = np.array([index.max_depth(n) for n in names])
+        mindepths = np.array([index.min_depth(n) for n in names])
+        # distances to the ancestors of the columns, NONE if unrelated
+        NONE = 1 << 20
+
+        def distances(name):
+            dists = np.full(len(names), NONE, dtype=np.int32)
+            for a, d in index.ancestors(name).items():
+                k = ids.get(a)
+                if k is not None:
+                    dists[k] = d
+            return dists
+
+        coldists = np.array([distances(n) for n in colnames])
+        colmindepths = mindepths[[ids[n] for n in colnames]]
+        lcsdists = {}
+        for i in rowids:
+            name = rows[i].name()
+            rowdists = distances(name)
+            common = (rowdists < NONE) & (coldists < NONE)
+            related = common.any(axis=1)
+            lcs = common.argmax(axis=1)
+            dlcs = maxdepths[lcs] + 1
+            if simtype == 'path':
+                distance = np.where(common, rowdists + coldists, NONE).min(axis=1)
+                values = np.where(related, 1. / (distance + 1), 0.)
+            else:
+                candidates, inverse = np.unique(lcs, return_inverse=True)
+                for k in candidates.tolist():
+                    if k not in lcsdists:
+                        lcsdists[k] = distances(names[k])
+                dists = np.array([lcsdists[k] for k in candidates.tolist()])[inverse.reshape(-1)]
+                ds1 = (rowdists + dists).min(axis=1) + dlcs
+                ds2 = (coldists + dists).min(axis=1) + dlcs
+                if nltk:
+                    values = np.where(related, (2. * dlcs) / (ds1 + ds2), 0.)
+                else:
+                    # all lowest common hypernyms
+                    lch = common & (maxdepths == maxdepths[lcs][:, None])
+                    rowdepth = np.maximum(index.min_depth(name), colmindepths)
+                    branch = np.where(lch, mindepths, NONE).min(axis=1) / np.maximum(rowdepth, 1)
+                    posdiff = 0. + (1 - branch)
+                    values = np.where(related, 2. * dlcs / (ds1 + ds2 + posdiff), 0.)
+            # pairs in a hypernymy relation are left to the pairwise measures
+            hyponymy = rowdists[[ids[n] for n in colnames]] < NONE
+            if name in ids:
+                hyponymy |= coldists[:, ids[name]] < NONE
+            matrix[i, colids] = values
+            done[i, colids] = ~hyponymy
+        return matrix, done
 
 
-    @synchronized(wordnetlock)
     def wup(self, synset1, synset2, posdiff=0.):
         '''
         Returns a modified WUP Similarity of the given synsets:
@@ -693,12 +1057,26 @@ class WordNet(object):
                             for given synsets
         :return:            the modified WUP similarity
         '''
-        lcss = synset1.lowest_common_hypernyms(synset2)
-        if len(lcss) == 0: return 0.
-        lcs = lcss[0]
-        dlcs = lcs.max_depth() + 1
-        ds1 = synset1.shortest_path_distance(lcs)
-        ds2 = synset2.shortest_path_distance(lcs)
+        return self._memoized(_simkey(synset1, synset2, 'wup', posdiff),
+                              self._wup, synset1, synset2, posdiff)
+
+
+    def _wup(self, synset1, synset2, posdiff):
+        index = _index_of(synset1, synset2)
+        if index is not None:
+            lcss = index.lowest_common_hypernyms(synset1.name(), synset2.name())
+            if len(lcss) == 0: return 0.
+            lcs = lcss[0]
+            dlcs = index.max_depth(lcs) + 1
+            ds1 = index.shortest_path_distance(synset1.name(), lcs)
+            ds2 = index.shortest_path_distance(synset2.name(), lcs)
+        else:
+            lcss = synset1.lowest_common_hypernyms(synset2)
+            if len(lcss) == 0: return 0.
+            lcs = lcss[0]
+            dlcs = lcs.max_depth() + 1
+            ds1 = synset1.shortest_path_distance(lcs)
+            ds2 = synset2.shortest_path_distance(lcs)
         if ds1 is None or ds2 is None: return 0.
         ds1 += dlcs
         ds2 += dlcs
@@ -706,7 +1084,6 @@ class WordNet(object):
         return 2. * dlcs / (ds1 + ds2 + posdiff)
 
 
-    @synchronized(wordnetlock)
     def syns_taxonomy_branch_relation(self, synset1, synset2):
         '''
         Returns the relation of the depth of the two given concepts to the
@@ -716,11 +1093,16 @@ class WordNet(object):
         :param synset2:     the second synset to compare
         :return:            a value between 1 and 0
         '''
-        if not synset1.lowest_common_hypernyms(synset2): return 0
-        return min([x.min_depth() for x in synset1.lowest_common_hypernyms(synset2)]) / max(synset1.min_depth(), synset2.min_depth())
+        index = _index_of(synset1, synset2)
+        if index is not None:
+            lch = index.lowest_common_hypernyms(synset1.name(), synset2.name())
+            if not lch: return 0
+            return min([index.min_depth(x) for x in lch]) / max(index.min_depth(synset1.name()), index.min_depth(synset2.name()))
+        lch = synset1.lowest_common_hypernyms(synset2)
+        if not lch: return 0
+        return min([x.min_depth() for x in lch]) / max(synset1.min_depth(), synset2.min_depth())
 
 
-    @synchronized(wordnetlock)
     def syns_hyp_relation(self, syn1, syn2):
         '''
         Returns a value representing if the two concepts are in a direct hyper-
@@ -732,32 +1114,52 @@ class WordNet(object):
         :param syn2:    the second synset to compare
         :return:        a value between 1 and 0
         '''
-        lch = syn1.lowest_common_hypernyms(syn2)
-        syn1len = 0.
-        syn2len = 0.
-        if syn1 not in lch and syn2 not in lch:
-            return 0.
-        if not any(syn2 in path for path in syn1.hypernym_paths()):
-            syn1len = min([float(len(x)) for x in syn1.hypernym_paths()])
-        else:
-            for path in syn1.hypernym_paths():
-                if syn2 not in path:
-                    continue
-                else:
-                    syn1len = float(len(path))
-        if not any(syn1 in path for path in syn2.hypernym_paths()):
-            syn2len = min([float(len(x)) for x in syn2.hypernym_paths()])
+        index = _index_of(syn1, syn2)
+        if index is not None:
+            lch = index.lowest_common_hypernyms(syn1.name(), syn2.name())
+            if syn1.name() not in lch and syn2.name() not in lch:
+                return 0.
         else:
-            for path in syn2.hypernym_paths():
-                if syn1 not in path:
-                    continue
-                else:
-                    syn2len = float(len(path))
-
+            lch = syn1.lowest_common_hypernyms(syn2)
+            if syn1 not in lch and syn2 not in lch:
+                return 0.
+        syn1len = self._hyp_path_length(syn1, syn2, index)
+        syn2len = self._hyp_path_length(syn2, syn1, index)
         return 1. - (abs(syn1len - syn2len) / max(syn1len, syn2len))
 
 
-    @synchronized(wordnetlock)
+    def _hyp_path_length(self, synset, hypernym, index=None):
+        '''
+        Returns the length of the last hypernym path of ``synset`` containing
+        ``hypernym``, or the length of its shortest hypernym path if there is
+        no such path.
+        '''
+        if index is not None and not index.is_hypernym(hypernym.name(), synset.name()):
+            return float(index.min_depth(synset.name()) + 1)
+        paths = self._hypernym_paths(synset)
+        if not any(hypernym in path for path in paths):
+            return min([float(len(x)) for x in paths])
+        length = 0.
+        for path in paths:
+            if hypernym in path:
+                length = float(len(path))
+        return length
+
+
+    def _hypernym_paths(self, synset):
+        '''
+        Returns the (memoized) NLTK hypernym paths of ``synset``. The result
+        must not be modified.
+        '''
+        if isinstance(synset, RationalNumberSynset):
+            return synset.hypernym_paths()
+        paths = pathcache.get(synset.name())
+        if paths is None:
+            paths = synset.hypernym_paths()
+            pathcache.put(synset.name(), paths)
+        return paths
+
+
     def semilarity(self, synset1, synset2):
         '''
         Returns our custom semantic similarity by Daniel Nyga and Dominik
@@ -789,11 +1191,15 @@ class WordNet(object):
         return (h_r - h_s) / (h_r - .5 * (h_a + h_b))
 
 
-    @synchronized(wordnetlock)
     def get_subtree_height(self, synset):
         '''
         Returns the height of the subtree of the given synset.
 
+        The heights are memoized for every synset visited, in a table shared
+        by all instances for the full WordNet taxonomy, and in a table of
+        this instance for the collapsed taxonomy, which is discarded whenever
+        the taxonomy is re-initialized.
+
         :param synset:  the synset to retrieve the height of
         :return:        the height of the synset in the taxonomy
         '''
@@ -802,26 +1208,29 @@ class WordNet(object):
         if synset is None:
             return 0
         assert type(synset) == Synset
-
-        height = self.__get_subtree_height(synset)
-        return height
+        # the heights are bound to the concepts they have been computed for,
+        # since the taxonomy may be swapped by a concurrent initialize_taxonomy()
+        known_concepts, heights = self._coreheights
+        if self.core_taxonomy is None:
+            heights, known_concepts = fullheights, None
+        return self.__get_subtree_height(synset, heights, known_concepts)
 
 
-    @synchronized(wordnetlock)
-    def __get_subtree_height(self, synset, current_height=0):
+    def __get_subtree_height(self, synset, heights, known_concepts):
+        height = heights.get(synset.name())
+        if height is not None:
+            return height
         hypos = synset.hyponyms()
-        if self.core_taxonomy is not None:
-            hypos = set([s.name() for s in hypos]).intersection(self.known_concepts)
-            hypos = [self.synset(s) for s in hypos]
+        if known_concepts is not None:
+            hypos = [wordnet.synset(s) for s in set([s.name() for s in hypos]).intersection(known_concepts)]
         if len(hypos) == 0:  # we have a leaf node
-            return current_height
-        children_heights = []
-        for child in hypos:
-            children_heights.append(self.__get_subtree_height(child, current_height + 1))
-        return max(children_heights)
+            height = 0
+        else:
+            height = 1 + max([self.__get_subtree_height(child, heights, known_concepts) for child in hypos])
+        heights[synset.name()] = height
+        return height
 
 
-    @synchronized(wordnetlock)
     def hypernym_paths(self, synset):
         '''
         Returns a list of lists specifying the hypernymy paths
@@ -848,7 +1257,6 @@ class WordNet(object):
         return paths
 
 
-    @synchronized(wordnetlock)
     def get_mln_similarity_and_sense_assertions(self, known_concepts, unknown_concepts):
         for i, unkwn in enumerate(unknown_concepts):
             for kwn in known_concepts:
@@ -856,16 +1264,20 @@ class WordNet(object):
             print()
 
 
-    @synchronized(wordnetlock)
     def lemmatize(self, word, pos):
         '''
         Returns the lemmatized ``word`` given its part of speech ``pos``.
         
         :return:    the lemma of ``word``
         '''
-        if pos in ('n', 'v', 'a', 's'):
-            return self.lemmatizer.lemmatize(word, pos)
-        return word
+        if pos not in ('n', 'v', 'a', 's'):
+            return word
+        key = ('lemma', word, pos)
+        lemma = lookupcache.get(key)
+        if lemma is None:
+            lemma = wordnet_store().lemmatize(word, pos)
+            lookupcache.put(key, lemma)
+        return lemma
         
     
     def nltkpos(self, penntreepos):
@@ -875,7 +1287,6 @@ class WordNet(object):
         return POS_MAP.get(penntreepos)
         
 
-    @synchronized(wordnetlock)
     def graph(self):
         '''
         Returns a GraphML object.
@@ -884,6 +1295,7 @@ class WordNet(object):
         '''
         if self.core_taxonomy is None:
             raise Exception('Need a collapsed taxonomy')
+        from pracmln.utils.graphml import Graph, Node as GMLNode, Edge
         tax = self.core_taxonomy
         g = Graph()
         processed = {}
@@ -898,7 +1310,6 @@ class WordNet(object):
         return g
 
 
-    @synchronized(wordnetlock)
     def to_dot(self):
         '''
         Returns a Digraph object.
@@ -907,6 +1318,7 @@ class WordNet(object):
         '''
         if self.core_taxonomy is None:
             raise Exception('Need a collapsed taxonomy')
+        import graphviz as gv
         tax = self.core_taxonomy
         g = gv.Digraph(format='svg')
         g.attr('graph', nodesep='.5', splines='true', rankdir='BT',
@@ -924,7 +1336,6 @@ class WordNet(object):
         return g
 
 
-    @synchronized(wordnetlock)
     def to_svg(self):
         '''
         Renders the graph to a file.
@@ -935,7 +1346,6 @@ class WordNet(object):
         return render_gv(g)
 
 
-    @synchronized(wordnetlock)
     def get_all_synsets(self):
         '''
         Convenience function to return all synsets in the wordnet taxonomy
@@ -24,8 +24,6 @@
 import datetime
 from pprint import pprint
 
-from scipy.stats import stats
-
 from pracmln.mln.util import edict, avg
 from . import constants
 
@@ -213,6 +211,7 @@ class Howto(Frame):
         '''
         specs = [s.specifity() for s in self.steps]
         specs.append(Frame.specifity(self))
+        from scipy.stats import stats
         return stats.hmean(specs)
 
 
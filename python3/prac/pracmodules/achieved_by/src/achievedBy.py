@@ -29,12 +29,9 @@ from prac.core import locations as pracloc
 from prac.core.base import PRACModule, PRACDatabase
 from prac.core.inference import PRACInferenceStep, FrameNode
 from prac.db.ies.models import Frame
-from prac.pracutils.utils import prac_heading
-from pracmln.mln.base import parse_mln
+from prac.pracutils.utils import prac_heading, get_cond_prob_png
 from pracmln.mln.errors import NoConstraintsError
 from pracmln.mln.util import colorize
-from pracmln.utils.project import MLNProject
-from pracmln.utils.visualization import get_cond_prob_png
 
 
 logger = logs.getlogger(__name__, logs.DEBUG)
@@ -96,7 +93,6 @@ class AchievedBy(PRACModule):
             infstep.indbs.append(olddb.copy())
             #To handle multiple acs in one task, we have to check if the single 
             # dbs contain achieved_bys which representing already plans
-            pngs = {}
             actioncore = node.frame.actioncore
             mod = self.prac.module('complex_achieved_by')
             newnodes = list(mod(node))
@@ -130,7 +126,7 @@ class AchievedBy(PRACModule):
                     logger.debug('Loading Project: {}.pracmln'.format(colorize(actioncore, (None, 'cyan', True), True)))
                     projectpath = os.path.join(pracloc.pracmodules, self.name, '{}.pracmln'.format(actioncore))
                     if os.path.exists(projectpath):
-                        project = MLNProject.open(projectpath)
+                        project = self.load_project(projectpath)
                     else:
                         infstep.outdbs.append(olddb)
                         logger.error(actioncore + ".pracmln does not exist.")
@@ -141,17 +137,13 @@ class AchievedBy(PRACModule):
                     project = params.get('project')
                         
     
-                mlntext = project.mlns.get(project.queryconf['mln'], None)
-                mln = parse_mln(mlntext, searchpaths=[self.module_path],
-                                projectpath=projectpath,
-                                logic=project.queryconf.get('logic', 'FirstOrderLogic'),
-                                grammar=project.queryconf.get('grammar', 'PRACGrammar'))
+                mln = self.project_mln(project, projectpath)
                 known_concepts = mln.domains.get('concept', [])
                 wnmod = self.prac.module('wn_senses')
                 
                 #Merge domains of db and given mln to avoid errors due to role inference and the resulting missing fuzzy perdicates
                 known_concepts = list(set(known_concepts).union(set(db_.domains.get('concept', []))))
-                db = wnmod.get_senses_and_similarities(db_, known_concepts)
+                db = wnmod.get_senses_and_similarities(db_, known_concepts, cache=node.pracinfer.sensecache)
     
                 unified_db = db_.union(db)
                 dbnew = wnmod.add_sims(unified_db, unified_db)
@@ -184,7 +176,8 @@ class AchievedBy(PRACModule):
                 for qa in result_db.query('achieved_by(?ac1,?ac2)'):
                     if qa['?ac2'] == 'Complex': continue
                     unified_db << 'achieved_by({},{})'.format(qa['?ac1'], qa['?ac2'])
-                    pngs[qa['?ac2']] = get_cond_prob_png(project.queryconf.get('queries', ''), dbs, filename=self.name)
+                    infstep.add_png(qa['?ac2'], get_cond_prob_png, project.queryconf.get('queries', ''), dbs,
+                                    filename=self.name)
                     newframe = Frame(self.prac, node.frame.sidx, '', words=[], syntax=[], actioncore=qa['?ac2'], actionroles={})
 #                     out('->', newframe)
                     infstep.outdbs.append(unified_db)
@@ -26,12 +26,11 @@ from dnutils import logs
 from pracmln.mln.base import parse_mln
 from pracmln.mln.util import colorize
 from pracmln.utils.project import MLNProject
-from pracmln.utils.visualization import get_cond_prob_png
 
 from prac.core import locations as pracloc
 from prac.core.base import PRACModule, PRACPIPE
 from prac.core.inference import PRACInferenceStep
-from prac.pracutils.utils import prac_heading
+from prac.pracutils.utils import prac_heading, get_cond_prob_png
 
 
 logger = logs.getlogger(__name__, logs.DEBUG)
@@ -71,7 +70,6 @@ class ControlStructureIdentification(PRACModule):
         mln = parse_mln(mlntext, searchpaths=[self.module_path], projectpath=projectpath, logic=ac_project.queryconf.get('logic', 'FirstOrderLogic'), grammar=ac_project.queryconf.get('grammar', 'PRACGrammar'))
         inf_step = PRACInferenceStep(pracinference, self)
 
-        pngs = {}
         for i, db in enumerate(dbs):
             db_ = db.copy()
 
@@ -97,8 +95,8 @@ class ControlStructureIdentification(PRACModule):
                 db_ << 'condition({})'.format(q['?w'])
                 
             inf_step.output_dbs.append(db_)
-            pngs['CS' + str(i)] = get_cond_prob_png(ac_project.queryconf.get('queries', ''), dbs, filename=self.name)
-            inf_step.png = pngs
+            inf_step.add_png('CS' + str(i), get_cond_prob_png, ac_project.queryconf.get('queries', ''), dbs,
+                             filename=self.name)
 
         inf_step.applied_settings = ac_project.queryconf.config
     
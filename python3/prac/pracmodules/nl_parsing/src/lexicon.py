@@ -0,0 +1,139 @@
+# PRAC -- COMPOUND WORD LEXICON
+#
+# (C) 2016 by Daniel Nyga (nyga@cs.uni-bremen.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import os
+import pickle
+from threading import RLock
+
+from dnutils import logs, ifnone
+from nltk.corpus import wordnet as wn
+
+from prac.core import locations
+
+
+logger = logs.getlogger(__name__, logs.INFO)
+
+SEPARATORS = '_-'
+
+
+def stem(word):
+    '''
+    Returns the part of the compound ``word`` up to and including its last
+    separator, e.g. ``external-combustion_`` for ``external-combustion_engine``.
+    '''
+    return word[:max(word.rfind(s) for s in SEPARATORS) + 1]
+
+
+class CompoundLexicon(object):
+    '''
+    Index of the multi-word lemmas in WordNet for detecting compound words.
+
+    The morphological rules WordNet applies to a lookup only ever rewrite the
+    suffix of the last component of a word, so a candidate compound can only
+    have synsets if its stem (see ``stem``) is the stem of a multi-word lemma
+    or of a morphological exception. The lexicon holds the set of these stems,
+    so most candidates are rejected by a single hash lookup. The remaining
+    ones are checked in WordNet once and memoized, which keeps the result
+    identical to ``len(wn.synsets(word)) > 0``.
+    '''
+
+    def __init__(self, stems=None, maxsize=100000):
+        '''
+        :param stems:       the set of stems of all multi-word lemmas. If
+                            ``None``, it is computed from WordNet.
+        :param maxsize:     the maximal number of memoized WordNet lookups.
+        '''
+        self.stems = ifnone(stems, self.build())
+        self.maxsize = maxsize
+        self._known = {}
+
+
+    @staticmethod
+    def build():
+        '''
+        Computes the stems of all multi-word lemmas and morphological
+        exceptions in WordNet.
+        '''
+        words = set(wn.all_lemma_names())
+        for exceptions in wn._exception_map.values():
+            words.update(exceptions)
+        return set(stem(w) for w in words if any(s in w for s in SEPARATORS))
+
+
+    def __contains__(self, word):
+        '''
+        Returns ``True`` iff ``word`` has at least one synset in WordNet.
+        '''
+        word = word.lower()
+        if stem(word) not in self.stems:
+            return False
+        found = self._known.get(word)
+        if found is None:
+            if len(self._known) >= self.maxsize:
+                self._known.clear()
+            found = self._known[word] = len(wn.synsets(word)) > 0
+        return found
+
+
+    def save(self, filepath):
+        with open(filepath, 'wb') as f:
+            pickle.dump(self.stems, f, pickle.HIGHEST_PROTOCOL)
+
+
+    @staticmethod
+    def load(filepath):
+        with open(filepath, 'rb') as f:
+            return CompoundLexicon(pickle.load(f))
+
+
+_lexicon = None
+_lexiconlock = RLock()
+
+
+def compound_lexicon(persist=True):
+    '''
+    Returns the process-wide compound lexicon.
+
+    :param persist:     if ``True``, the lexicon is loaded from (or saved to)
+                        the PRAC user data directory, such that it needs to
+                        be built only once per WordNet version.
+    '''
+    global _lexicon
+    with _lexiconlock:
+        if _lexicon is not None:
+            return _lexicon
+        filepath = os.path.join(locations.user_data, 'compounds-wn%s.pickle' % wn.get_version())
+        if persist and os.path.exists(filepath):
+            try:
+                _lexicon = CompoundLexicon.load(filepath)
+                return _lexicon
+            except Exception:
+                logger.warning('could not load compound lexicon from %s. Rebuilding...' % filepath)
+        _lexicon = CompoundLexicon()
+        if persist:
+            try:
+                if not os.path.exists(locations.user_data):
+                    os.makedirs(locations.user_data)
+                _lexicon.save(filepath)
+            except (IOError, OSError):
+                logger.warning('could not save compound lexicon to %s' % filepath)
+        return _lexicon
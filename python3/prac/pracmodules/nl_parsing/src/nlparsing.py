@@ -21,33 +21,27 @@
 # TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
 # SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 import itertools
-import json
 import os
 import re
 import string
-import subprocess
 import sys
-from tempfile import NamedTemporaryFile
-import jpype
+import time
 
 from dnutils import logs
 from nltk import word_tokenize
-from nltk.corpus import wordnet as wn
 from pracmln import MLN
-from pracmln.mln.database import parse_db
 from pracmln.mln.util import colorize
-from pracmln.utils.visualization import get_cond_prob_png
 
-from prac.core import locations
-from prac.core.base import PRACModule
+from prac.core.base import PRACModule, PRACDatabase
 from prac.core.errors import ParserError
 from prac.core.inference import PRACInferenceStep, NLInstruction
-from prac.core.wordnet import WordNet
-from prac.pracutils.utils import prac_heading
+from prac.pracutils.utils import prac_heading, get_cond_prob_png
+from lexicon import compound_lexicon
+from parsecache import parse_cache
+from parserservice import parser_service, parser_pool
 
 
 logger = logs.getlogger(__name__, logs.INFO)
-wordnet = WordNet(concepts=None)
 
 
 class StanfordParser(object):
@@ -58,6 +52,7 @@ class StanfordParser(object):
 
 
     def __init__(self, pcfg_model_fname=None):
+        import jpype
         self.pcfg_model_fname = pcfg_model_fname
         self.package_lexparser = jpype.JPackage("edu.stanford.nlp.parser.lexparser")
         self.package_trees = jpype.JPackage('edu.stanford.nlp.trees')
@@ -164,6 +159,7 @@ class NLParsing(PRACModule):
     def __init__(self, prac):
         PRACModule.__init__(self, prac)
         self.mln = None
+        self.cache = None
 
 
     def initialize(self):
@@ -171,6 +167,8 @@ class NLParsing(PRACModule):
 
         self.mln = MLN(mlnfile=os.path.join(self.module_path, 'mln', 'predicates.mln'),
                        grammar='PRACGrammar', logic='FuzzyLogic')
+        if self.prac.config.getboolean('nl_parsing', 'cache'):
+            self.cache = parse_cache(self.prac.config.getint('nl_parsing', 'cachesize'))
 
 
     @staticmethod
@@ -234,6 +232,7 @@ class NLParsing(PRACModule):
                             replaced by a representation that can be found in
                             the Wordnet ontology
         '''
+        lexicon = compound_lexicon()
         instr = word_tokenize(sentence)
         newinstr = []
 
@@ -247,7 +246,7 @@ class NLParsing(PRACModule):
                     tmpword = '{}{}{}{}{}'.format(instr[i], x[0], instr[min(len(instr)-1, i+1)],
                                                   x[1], instr[min(len(instr)-1, i+2)])
                     # this is hack for the concept on_the_table
-                    if len(wn.synsets(tmpword)) > 0 and tmpword != 'on_the_table':  
+                    if tmpword in lexicon and tmpword != 'on_the_table':
                         newinstr.append(tmpword+stop)
                         found = True
                         i += 3
@@ -256,7 +255,7 @@ class NLParsing(PRACModule):
                 if not found:
                     for y in ['_', '-']:
                         tmpword = '{}{}{}'.format(instr[i], y, instr[min(len(instr)-1, i+1)])
-                        if len(wn.synsets(tmpword)) > 0:
+                        if tmpword in lexicon:
                             newinstr.append(tmpword+stop)
                             found = True
                             i += 2
@@ -270,6 +269,20 @@ class NLParsing(PRACModule):
         # untokenize sentence before returning.
         return "".join([" "+i if not i.startswith("'") and i not in string.punctuation else i for i in newinstr]).strip()
 
+
+    def preprocess(self, sentence):
+        '''
+        Returns ``sentence`` with its compound words joined (see
+        ``compounds``), using the parse cache if it is enabled.
+        '''
+        if self.cache is None:
+            return self.compounds(sentence)
+        instr = self.cache.get('compounds', sentence)
+        if instr is None:
+            instr = self.compounds(sentence)
+            self.cache.put('compounds', sentence, instr)
+        return instr
+
     
     def parse(self, sentences):
         '''
@@ -277,25 +290,63 @@ class NLParsing(PRACModule):
         syntactic structure of the sentences in form of MLN databases
         containing the respective atoms.
 
+        The sentences are handed to the process-wide parser service, which
+        keeps the grammar loaded across calls. Sentences found in the parse
+        cache are not parsed again.
+
         :param sentences:   a sentence or list of sentences in natural language
-        :return:            a list of databases returned by parse_db
+        :return:            a list of PRACDatabase objects, one per sentence
+        '''
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        logger.debug('Calling Stanford Parser: {}'.format(sentences))
+        return [self._todb(atoms) for atoms in self._cached(sentences, parser_service().parse)]
+
+
+    def parse_batch(self, sentences, workers=None):
+        '''
+        Parses a large number of sentences in parallel on a pool of parser
+        workers and returns their databases in the order of the input.
+
+        :param sentences:   a list of sentences in natural language
+        :param workers:     the number of parser workers. Defaults to the
+                            number of CPU cores.
+        :return:            a list of PRACDatabase objects, one per sentence
+        '''
+        start = time.time()
+        dbs = [self._todb(atoms) for atoms in self._cached(sentences, parser_pool(workers).parse)]
+        elapsed = time.time() - start
+        if self.prac.verbose > 0:
+            print('Parsed {} sentences ({:.2f} sentences/sec)'.format(len(dbs), len(dbs) / elapsed if elapsed > 0 else float('inf')))
+        return dbs
+
+
+    def _cached(self, sentences, parse):
+        '''
+        Looks up the parses of ``sentences`` in the parse cache and calls
+        ``parse`` only on the sentences that are missing.
+        '''
+        sentences = list(sentences)
+        if self.cache is None:
+            return parse(sentences)
+        results = [self.cache.get('parse', s) for s in sentences]
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            for i, atoms in zip(missing, parse([sentences[i] for i in missing])):
+                self.cache.put('parse', sentences[i], atoms)
+                results[i] = atoms
+        return results
+
+
+    def _todb(self, atoms):
+        '''
+        Builds a database from the (predname, args) tuples returned by the
+        parser.
         '''
-        #=======================================================================
-        # Create a temporary file in which nlparse will write its result
-        #=======================================================================
-        filepath = None
-        with NamedTemporaryFile(suffix='.db', delete=False) as f:
-            filepath = f.name
-        cmd = ['python', os.path.join(self.module_path, 'src', 'nlparse.py'), '--out-file', filepath]
-        cmd.extend([json.dumps(s) for s in sentences])
-
-        logger.debug('Calling Stanford Parser: '.format(cmd))
-        envs = os.environ
-        envs.update({"PYTHONPATH": locations.code_base})
-        subprocess.call(cmd, env=envs, )
-        with open(filepath, 'r') as f:
-            c = f.read()
-            return parse_db(self.mln, c)
+        db = PRACDatabase(self.prac)
+        for predname, args in atoms:
+            db.add_atom(predname, args)
+        return db
 
 
     
@@ -313,7 +364,7 @@ class NLParsing(PRACModule):
         # ======================================================================
         # Preprocessing
         # ======================================================================
-        instr = self.compounds(node.instr)
+        instr = self.preprocess(node.instr)
         # ======================================================================
         # Parsing Instructions
         # ======================================================================
@@ -330,7 +381,6 @@ class NLParsing(PRACModule):
                 if q['?w'].lower().startswith('season'):
                     db['has_pos(%s,NN)' % q['?w']] = 0
                     db['has_pos(%s,VB)' % q['?w']] = 1
-        pngs = {}
         for i, db in enumerate(dbs):
             infstep.outdbs.append(db)
 
@@ -339,7 +389,7 @@ class NLParsing(PRACModule):
                 print(colorize('Syntactic evidence:', (None, 'white', True), True))
                 db.write(sys.stdout, True)
                 print()
-            pngs['NL Parsing - ' + str(i)] = get_cond_prob_png(','.join([x.name for x in self.mln.predicates[:10]]) + ',...',
-                                                               str(node.instr), filename=self.name)
-            infstep.png = pngs
+            infstep.add_png('NL Parsing - ' + str(i), get_cond_prob_png,
+                            ','.join([x.name for x in self.mln.predicates[:10]]) + ',...',
+                            str(node.instr), filename=self.name)
         yield node
@@ -0,0 +1,264 @@
+# PRAC -- NATURAL LANGUAGE PARSING SERVICE
+#
+# (C) 2016 by Daniel Nyga (nyga@cs.uni-bremen.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import atexit
+import multiprocessing
+import time
+import traceback
+from queue import Queue, Empty
+from threading import RLock, Thread
+
+from dnutils import logs, ifnone
+
+from prac.core.errors import ParserError
+from prac.pracutils.utils import partition
+
+
+logger = logs.getlogger(__name__, logs.INFO)
+
+
+def _serve(conn, grammar):
+    '''
+    Main loop of the parser worker process. Loads the grammar once and
+    answers lists of sentences with lists of ground atoms until it receives
+    ``None`` or the connection is closed.
+    '''
+    import nlparse
+    parser = nlparse.load_parser(grammar)
+    while True:
+        try:
+            sentences = conn.recv()
+        except (EOFError, IOError):
+            break
+        if sentences is None:
+            break
+        try:
+            result = [nlparse.parse_sentence(parser, s) for s in sentences]
+            conn.send(('ok', result))
+        except Exception:
+            conn.send(('error', traceback.format_exc()))
+    conn.close()
+
+
+class ParserService(object):
+    '''
+    Long-lived worker process holding a Stanford parser with its grammar
+    loaded.
+
+    The JVM lives in a child process, such that the grammar needs to be
+    loaded only once and a crashed JVM can be replaced by a fresh worker
+    without affecting the calling process.
+    '''
+
+    def __init__(self, grammar=None, retries=1):
+        '''
+        :param grammar:     path to the serialized grammar. If ``None``, the
+                            default English PCFG grammar is used.
+        :param retries:     how often a request is repeated after the worker
+                            process has died.
+        '''
+        self.grammar = grammar
+        self.retries = retries
+        self._proc = None
+        self._conn = None
+        self._lock = RLock()
+
+
+    @property
+    def alive(self):
+        return self._proc is not None and self._proc.is_alive()
+
+
+    def start(self):
+        '''
+        Spawns the worker process. Does nothing if it is already running.
+        '''
+        with self._lock:
+            if self.alive: return
+            self.stop()
+            conn, childconn = multiprocessing.Pipe()
+            self._proc = multiprocessing.Process(target=_serve, args=(childconn, self.grammar))
+            self._proc.daemon = True
+            self._proc.start()
+            childconn.close()
+            self._conn = conn
+            logger.debug('started parser process (pid %s)' % self._proc.pid)
+
+
+    def stop(self):
+        '''
+        Shuts down the worker process.
+        '''
+        with self._lock:
+            if self._conn is not None:
+                try:
+                    self._conn.send(None)
+                except (IOError, OSError):
+                    pass
+                self._conn.close()
+                self._conn = None
+            if self._proc is not None:
+                self._proc.join(1)
+                if self._proc.is_alive():
+                    self._proc.terminate()
+                self._proc = None
+
+
+    def parse(self, sentences):
+        '''
+        Parses the given sentences.
+
+        :param sentences:   a list of sentences in natural language
+        :return:            a list containing for every sentence the list of
+                            (predname, args) tuples representing its syntax
+        '''
+        sentences = list(sentences)
+        with self._lock:
+            for _ in range(self.retries + 1):
+                self.start()
+                try:
+                    self._conn.send(sentences)
+                    status, result = self._conn.recv()
+                except (EOFError, IOError, OSError):
+                    logger.warning('parser process died. Restarting...')
+                    self.stop()
+                    continue
+                if status == 'error':
+                    raise ParserError(result)
+                return result
+        raise ParserError('Parser process died %d times in a row.' % (self.retries + 1))
+
+
+class ParserPool(object):
+    '''
+    Pool of warm parser workers for bulk parsing.
+
+    Sentences are split into chunks, which are fanned out across the
+    workers. The results are gathered in the order of the input sentences.
+    '''
+
+    def __init__(self, workers=None, grammar=None, chunksize=8):
+        '''
+        :param workers:     the number of worker processes. Defaults to the
+                            number of CPU cores.
+        :param grammar:     path to the serialized grammar.
+        :param chunksize:   the number of sentences sent to a worker at once.
+        '''
+        workers = ifnone(workers, multiprocessing.cpu_count())
+        self.workers = [ParserService(grammar) for _ in range(workers)]
+        self.chunksize = chunksize
+        self.throughput = None
+
+
+    def start(self):
+        '''
+        Spawns all worker processes.
+        '''
+        for worker in self.workers:
+            worker.start()
+
+
+    def stop(self):
+        '''
+        Shuts down all worker processes.
+        '''
+        for worker in self.workers:
+            worker.stop()
+
+
+    def parse(self, sentences):
+        '''
+        Parses the given sentences in parallel.
+
+        :param sentences:   a list of sentences in natural language
+        :return:            a list containing for every sentence the list of
+                            (predname, args) tuples representing its syntax
+        '''
+        sentences = list(sentences)
+        chunks = list(partition(sentences, self.chunksize))
+        results = [None] * len(chunks)
+        errors = []
+        todo = Queue()
+        for i in range(len(chunks)):
+            todo.put(i)
+
+        def work(worker):
+            while not errors:
+                try:
+                    i = todo.get_nowait()
+                except Empty:
+                    return
+                try:
+                    results[i] = worker.parse(chunks[i])
+                except Exception as e:
+                    errors.append(e)
+
+        start = time.time()
+        threads = [Thread(target=work, args=(w,)) for w in self.workers]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        if errors:
+            raise errors[0]
+        elapsed = time.time() - start
+        self.throughput = len(sentences) / elapsed if elapsed > 0 else float('inf')
+        logger.info('parsed %d sentences with %d workers in %.2f sec (%.2f sentences/sec)' % (len(sentences), len(self.workers), elapsed, self.throughput))
+        return [atoms for chunk in results for atoms in chunk]
+
+
+_service = None
+_pool = None
+_servicelock = RLock()
+
+
+def parser_service():
+    '''
+    Returns the process-wide parser service, which is shared by all PRAC
+    instances and inference runs.
+    '''
+    global _service
+    with _servicelock:
+        if _service is None:
+            _service = ParserService()
+            atexit.register(_service.stop)
+        return _service
+
+
+def parser_pool(workers=None):
+    '''
+    Returns the process-wide pool of parser workers. If a different number
+    of workers is requested than the current pool has, the pool is replaced.
+
+    :param workers:     the number of workers. Defaults to the number of CPU
+                        cores.
+    '''
+    global _pool
+    workers = ifnone(workers, multiprocessing.cpu_count())
+    with _servicelock:
+        if _pool is not None and len(_pool.workers) != workers:
+            _pool.stop()
+            _pool = None
+        if _pool is None:
+            _pool = ParserPool(workers)
+            atexit.register(_pool.stop)
+        return _pool
@@ -25,14 +25,12 @@ import traceback
 
 from dnutils import logs
 from pracmln.mln import NoConstraintsError
-from pracmln.mln.base import parse_mln, MLN
-from pracmln.utils.project import MLNProject
-from pracmln.utils.visualization import get_cond_prob_png
+from pracmln.mln.base import MLN
 
 from prac.core import locations as pracloc
 from prac.core.base import PRACModule
 from prac.core.inference import PRACInferenceStep
-from prac.pracutils.utils import prac_heading
+from prac.pracutils.utils import prac_heading, get_cond_prob_png
 
 
 logger = logs.getlogger(__name__, logs.DEBUG)
@@ -63,7 +61,7 @@ class PropExtraction(PRACModule):
         if params.get('project', None) is None:
             # load default project
             projectpath = os.path.join(pracloc.pracmodules, self.name, self.defproject)
-            project = MLNProject.open(projectpath)
+            project = self.load_project(projectpath)
         else:
             # load project from params
             projectpath = os.path.join(params.get('projectpath', None) or os.path.join(pracloc.pracmodules, self.name), params.get('project').name)
@@ -74,13 +72,9 @@ class PropExtraction(PRACModule):
         infstep = PRACInferenceStep(node, self)
         
 
-        mlntext = project.mlns.get(project.queryconf['mln'], None)
-        mln = parse_mln(mlntext, searchpaths=[self.module_path], projectpath=projectpath,
-                        logic=project.queryconf.get('logic', 'FuzzyLogic'),
-                        grammar=project.queryconf.get('grammar', 'PRACGrammar'))
+        mln = self.project_mln(project, projectpath, logic='FuzzyLogic')
         wnmod = self.prac.module('wn_senses')
 
-        pngs = {}
         for i, db in enumerate(dbs):
             # ==================================================================
             # Preprocessing
@@ -121,8 +115,8 @@ class PropExtraction(PRACModule):
                 logger.error('Something went wrong')
                 traceback.print_exc()
 
-            pngs['PropExtraction - ' + str(i)] = get_cond_prob_png(project.queryconf.get('queries', ''), infstep.indbs, filename=self.name)
-            infstep.png = pngs
+            infstep.add_png('PropExtraction - ' + str(i), get_cond_prob_png,
+                            project.queryconf.get('queries', ''), list(infstep.indbs), filename=self.name)
 
         infstep.applied_settings = project.queryconf.config
         return [node]
@@ -24,18 +24,15 @@ import os
 from collections import defaultdict
 
 from dnutils import logs
-from pracmln.mln.base import parse_mln
 from pracmln.mln.util import colorize
-from pracmln.utils.project import MLNProject
-from pracmln.utils.visualization import get_cond_prob_png
 
 from prac.core import locations as pracloc
-from prac.core.base import PRACModule, PRACDatabase
+from prac.core.base import PRACModule, PRACDatabase, parse_literal
 from prac.core.inference import PRACInferenceStep, FrameNode
 from prac.core.wordnet import WordNet
 from prac.db.ies.models import Object, Frame
 from prac.pracutils.pracgraphviz import render_gv
-from prac.pracutils.utils import prac_heading, splitd
+from prac.pracutils.utils import prac_heading, splitd, get_cond_prob_png
 from prac.sense_distribution import add_all_wordnet_similarities, get_prob_color
 
 
@@ -63,7 +60,6 @@ class SensesAndRoles(PRACModule):
         queries = ''
         wnmod = self.prac.module('wn_senses')
         actionroles = defaultdict(list)
-        pngs = {}
         for n, olddb in enumerate(dbs):
             db_copy = olddb.copy(mln=self.prac.mln)
             actioncore = node.frame.actioncore
@@ -71,28 +67,23 @@ class SensesAndRoles(PRACModule):
             if params.get('project', None) is None:
                 logger.debug('Loading Project: {}.pracmln'.format(colorize(actioncore, (None, 'cyan', True), True)))
                 projectpath = os.path.join(pracloc.pracmodules, self.name, '{}.pracmln'.format(actioncore))
-                project = MLNProject.open(projectpath)
+                project = self.load_project(projectpath)
             else:
                 logger.debug(colorize('Loading Project from params', (None, 'cyan', True), True))
                 projectpath = os.path.join(params.get('projectpath', None) or os.path.join(pracloc.pracmodules, self.name), params.get('project').name)
                 project = params.get('project')
 
             queries = project.queryconf.get('queries', '')
-            mlntext = project.mlns.get(project.queryconf['mln'], None)
-            mln = parse_mln(mlntext,
-                            searchpaths=[self.module_path],
-                            projectpath=projectpath,
-                            logic=project.queryconf.get('logic', 'FuzzyLogic'),
-                            grammar=project.queryconf.get('grammar', 'PRACGrammar'))
+            mln = self.project_mln(project, projectpath, logic='FuzzyLogic')
             known_concepts = mln.domains.get('concept', [])
 
             # ==============================================================
             # Preprocessing
             # ==============================================================
-            # adding senses and similarities. might be obsolete as it has
-            # already been performed in ac recognition
+            # adding senses and similarities. the ones already computed in
+            # ac recognition are taken from the cache of the inference
             logger.debug('adding senses. concepts={}'.format(known_concepts))
-            db = wnmod.get_senses_and_similarities(db_copy, known_concepts)
+            db = wnmod.get_senses_and_similarities(db_copy, known_concepts, cache=node.pracinfer.sensecache)
 
             # we need senses and similarities as well as original evidence
             tmp_union_db = db.union(db_copy, mln=self.prac.mln)
@@ -139,7 +130,7 @@ class SensesAndRoles(PRACModule):
             new_result = PRACDatabase(self.prac)
             for atom, truth in list(unified_db.evidence.items()):
                 if any(r in atom for r in roles):
-                    (_, predname, args) = self.prac.mln.logic.parse_literal(atom)
+                    (_, predname, args) = parse_literal(atom, self.prac.mln.logic)
                     if not args[-1] == actioncore:
                         continue
                 new_result << (atom, truth)
@@ -154,10 +145,8 @@ class SensesAndRoles(PRACModule):
 
             infstep.outdbs.append(new_result)
 
-            pngs['Recognizing {} roles - {}'.format('given', str(n))] = get_cond_prob_png(queries,
-                                                                                          infstep.indbs, 
-                                                                                          filename=self.name)
-            infstep.png = pngs
+            infstep.add_png('Recognizing {} roles - {}'.format('given', str(n)), get_cond_prob_png,
+                            queries, list(infstep.indbs), filename=self.name)
             
             if 'project' not in locals():
                 raise Exception('no actioncore in database: %s' % olddb)
@@ -195,13 +184,8 @@ class SensesAndRoles(PRACModule):
 
                     actioncore = q['?ac']
                     projectpath = os.path.join(self.module_path, '{}.pracmln'.format(actioncore))
-                    project = MLNProject.open(projectpath)
-                    mlntext = project.mlns.get(project.queryconf['mln'], None)
-                    mln = parse_mln(mlntext,
-                                    searchpaths=[self.module_path],
-                                    projectpath=projectpath,
-                                    logic=project.queryconf.get('logic', 'FirstOrderLogic'),
-                                    grammar=project.queryconf.get('grammar', 'PRACGrammar'))
+                    project = self.load_project(projectpath)
+                    mln = self.project_mln(project, projectpath)
 
                     # ==========================================================
                     # Preprocessing
@@ -210,12 +194,13 @@ class SensesAndRoles(PRACModule):
                     # add inferred concepts to known_concepts to display
                     # them in the graph. Ignore verbs and adjectives,
                     # as they do not have hypernym relations to nouns
-                    concepts = self.prac.config.getlist('wordnet', 'concepts')
+                    wn = WordNet(concepts=self.prac.config.getlist('wordnet', 'concepts'))
+                    concepts = []
                     for con in db_.query('has_sense(?w,?s)'):
                         if con['?s'].split('.')[1] in ['a', 's', 'v']:
                             continue
                         concepts.append(con['?s'])
-                    wn = WordNet(concepts=concepts)
+                    wn.add_concepts(concepts)
 
                     db = db_.copy(mln=mln)
                     for qs in db_.query('!(EXIST ?w (has_sense(?w,?s)))'):
@@ -270,13 +255,13 @@ class SensesAndRoles(PRACModule):
                         g = wn.to_dot()
                         maxprob = 0.
                         for atom, truth in result.gndatoms():
-                            _, predname, args = db.mln.logic.parse_literal(atom)
+                            _, predname, args = parse_literal(atom, db.mln.logic)
                             concept = args[1]
                             if predname == 'has_sense' and args[0] == word and concept != 'null':
                                 maxprob = max(maxprob, truth)
 
                         for atom, truth in result.gndatoms():
-                            _, predname, args = db.mln.logic.parse_literal(atom)
+                            _, predname, args = parse_literal(atom, db.mln.logic)
                             concept = args[1]
                             if predname == 'has_sense' and args[0] == word and concept != 'null':
                                 if concept in concepts:
@@ -29,7 +29,6 @@ from tempfile import NamedTemporaryFile
 from xml.etree.ElementTree import ElementTree
 
 from dnutils import logs
-from graphviz._compat import text_type
 
 
 logger = logs.getlogger(__name__)
@@ -43,6 +42,7 @@ def render_gv(graph, filename=None, directory='/tmp'):
     :return:        the rendered content.
     '''
     
+    from graphviz._compat import text_type
     rendered = ''
     try:
         with NamedTemporaryFile(suffix='dot', delete=False) as tmpfile:
@@ -1,10 +1,10 @@
 import os
+from collections import OrderedDict
+from threading import RLock
 
 import _thread
 
 from pracmln.mln.util import colorize
-from pracmln.utils.latexmath2png import math2png
-from pracmln.utils.visualization import DECLARATIONS
 
 
 def __splitdict(d, dnew):
@@ -65,6 +65,106 @@ def synchronized(lock):
     return wrap
 
 
+class LRUCache(object):
+    '''
+    Thread-safe dictionary holding at most ``maxsize`` entries. If it is
+    full, the least recently used entry is discarded. Keeps track of the
+    cache hits and misses.
+    '''
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = RLock()
+
+
+    def get(self, key, default=None):
+        '''
+        Returns the value stored for ``key`` or ``default`` if there is none.
+        '''
+        with self._lock:
+            if key not in self._data:
+                self.misses += 1
+                return default
+            self.hits += 1
+            value = self._data.pop(key)
+            self._data[key] = value
+            return value
+
+
+    def put(self, key, value):
+        '''
+        Stores ``value`` for ``key`` and discards the least recently used
+        entries if the cache is full.
+        '''
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = value
+            while len(self._data) > max(0, self.maxsize):
+                self._data.popitem(last=False)
+
+
+    def clear(self):
+        '''
+        Removes all entries and resets the counters.
+        '''
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+    def values(self):
+        '''
+        Returns a list of all values, without affecting their recency.
+        '''
+        with self._lock:
+            return list(self._data.values())
+
+
+    def items(self):
+        '''
+        Returns a list of all (key, value) pairs from the least to the most
+        recently used one, without affecting their recency.
+        '''
+        with self._lock:
+            return list(self._data.items())
+
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+    def __len__(self):
+        return len(self._data)
+
+
+    @property
+    def hitrate(self):
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.
+
+
+    def stats(self):
+        '''
+        Returns a dictionary with the size and the hit/miss counters.
+        '''
+        return {'entries': len(self), 'maxsize': self.maxsize, 'hits': self.hits,
+                'misses': self.misses, 'hitrate': self.hitrate}
+
+
+def get_cond_prob_png(queries, dbs, filename='cond_prob', filedir='/tmp'):
+    '''
+    Renders the conditional probability of ``queries`` given the evidence
+    ``dbs`` by ``pracmln.utils.visualization.get_cond_prob_png``, which is
+    only imported on the first call, since it loads matplotlib.
+    '''
+    from pracmln.utils.visualization import get_cond_prob_png
+    return get_cond_prob_png(queries, dbs, filename=filename, filedir=filedir)
+
+
 def get_query_png(queries, dbs, filename='cond_prob', filedir='/tmp', skolemword=''):
     '''
     Preprocessing of png generation: assemble latex code for argmax term
@@ -76,6 +176,8 @@ def get_query_png(queries, dbs, filename='cond_prob', filedir='/tmp', skolemword
     :param skolemword:  string value for skolemword looked up in mongo database
     :return:            a png string generated by math2png
     '''
+    from pracmln.utils.latexmath2png import math2png
+    from pracmln.utils.visualization import DECLARATIONS
     safefilename = '{}-{}-{}'.format(filename, os.getpid(), _thread.get_ident())
     declarations = DECLARATIONS + [r'''\newcommand{\simil}[1]{\ensuremath{sim\left(\begin{array}{cc}#1\end{array}\right)}}''']
 
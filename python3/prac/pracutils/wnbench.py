@@ -0,0 +1,113 @@
+# PRAC -- WORDNET BENCHMARKS
+#
+# (C) 2016 by Daniel Nyga (nyga@cs.uni-bremen.de)
+#
+# Permission is hereby granted, free of charge, to any person obtaining
+# a copy of this software and associated documentation files (the
+# "Software"), to deal in the Software without restriction, including
+# without limitation the rights to use, copy, modify, merge, publish,
+# distribute, sublicense, and/or sell copies of the Software, and to
+# permit persons to whom the Software is furnished to do so, subject to
+# the following conditions:
+#
+# The above copyright notice and this permission notice shall be
+# included in all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF
+# MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT.
+# IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY
+# CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT,
+# TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE
+# SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
+import argparse
+import itertools
+import time
+from threading import Thread
+
+from prac.core.wordnet import WordNet, simcache, pathcache, lookupcache
+
+
+# some concepts of the kitchen domain
+CONCEPTS = ['cup.n.01', 'bowl.n.01', 'bowl.n.03', 'spoon.n.01', 'fork.n.01',
+            'knife.n.01', 'plate.n.04', 'pot.n.01', 'pan.n.01', 'oven.n.01',
+            'milk.n.01', 'water.n.06', 'salt.n.02', 'sugar.n.01', 'flour.n.01',
+            'egg.n.02', 'butter.n.01', 'table.n.02', 'refrigerator.n.01',
+            'mixer.n.04', 'drawer.n.01', 'bottle.n.01', 'glass.n.02']
+
+
+def threaded_throughput(wordnet, pairs, threads=4, simtype='wup'):
+    '''
+    Computes the similarities of all ``pairs`` of synsets in ``threads``
+    concurrent threads.
+
+    :return:    the number of similarities per second
+    '''
+    chunks = [pairs[i::threads] for i in range(threads)]
+
+    def work(chunk):
+        for s1, s2 in chunk:
+            wordnet.similarity(s1, s2, simtype)
+
+    workers = [Thread(target=work, args=(c,)) for c in chunks]
+    start = time.time()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.time() - start
+    return len(pairs) / elapsed if elapsed > 0 else float('inf')
+
+
+def clear_caches():
+    '''
+    Discards all memoized similarities, hypernym paths and lookups, such
+    that the similarities are actually computed from WordNet.
+    '''
+    for cache in (simcache, pathcache, lookupcache):
+        cache.clear()
+
+
+def benchmark(wordnet=None, concepts=None, threads=(1, 2, 4, 8), repeat=3, simtype='wup'):
+    '''
+    Measures the throughput of ``WordNet.similarity`` for increasing numbers
+    of threads. The caches of the WordNet module are cleared before every
+    run, such that every pair is computed once per run.
+
+    :param wordnet:     the WordNet instance. Defaults to a fresh one without
+                        a collapsed taxonomy.
+    :param concepts:    the synset names whose pairwise similarities are
+                        computed. Defaults to some kitchen concepts.
+    :param threads:     the numbers of threads to be compared.
+    :param repeat:      the number of runs per number of threads, of which
+                        the fastest is reported.
+    :return:            a list of (threads, similarities per second) tuples
+    '''
+    if wordnet is None:
+        wordnet = WordNet(concepts=None)
+    concepts = [wordnet.synset(c) for c in (concepts or CONCEPTS)]
+    pairs = list(itertools.product(concepts, repeat=2))
+    # load the corpus and the taxonomy index, but no similarities
+    wordnet.similarity(concepts[0], concepts[-1], simtype)
+    results = []
+    for n in threads:
+        throughput = 0.
+        for _ in range(repeat):
+            clear_caches()
+            throughput = max(throughput, threaded_throughput(wordnet, pairs, n, simtype))
+        results.append((n, throughput))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark concurrent WordNet similarity queries.')
+    parser.add_argument('--threads', '-t', dest='threads', type=int, nargs='+', default=[1, 2, 4, 8], help='The numbers of threads to be compared.')
+    parser.add_argument('--repeat', '-r', dest='repeat', type=int, default=3, help='The number of runs per number of threads.')
+    parser.add_argument('--simtype', dest='simtype', default='wup', help='The similarity measure, "wup" or "path".')
+    args = parser.parse_args()
+    for n, throughput in benchmark(threads=args.threads, repeat=args.repeat, simtype=args.simtype):
+        print('{:>3d} threads: {:10.1f} similarities/sec'.format(n, throughput))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+'''
+Created on Oct 18, 2016
+
+@author: nyga
+'''
+import argparse
+import json
+import os
+
+from prac.core.base import PRAC
+
+
+def read_sentences(path, recursive=False):
+    '''
+    Reads natural-language instructions from ``path``, which may be a JSON
+    file containing a list of sentences (like ``examples/examples.json``) or
+    a directory of howtos as it is accepted by practell, i.e. files named by
+    the howto title containing one instruction step per line.
+    '''
+    if os.path.isdir(path):
+        for loc, dirs, files in os.walk(path):
+            for filename in files:
+                yield ' '.join(filename.split('-'))
+                with open(os.path.join(loc, filename)) as f:
+                    for line in f:
+                        if line.strip(): yield line.strip()
+            if not recursive: break
+    else:
+        with open(path) as f:
+            for s in json.load(f): yield s
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Manage the cache of the PRAC NL parsing module.')
+    parser.add_argument('paths', nargs='*', help='JSON files with lists of sentences or howto directories to warm the cache with.')
+    parser.add_argument('--recursive', '-r', dest='recursive', action='store_true', default=False, help='Descend into subdirectories of howto directories.')
+    parser.add_argument('--workers', '-w', dest='workers', type=int, default=None, help='The number of parser processes. Defaults to the number of CPU cores.')
+    parser.add_argument('--clear', dest='clear', action='store_true', default=False, help='Remove all entries from the cache.')
+    parser.add_argument('--stats', '-s', dest='stats', action='store_true', default=False, help='Print the cache statistics.')
+    args = parser.parse_args()
+
+    prac = PRAC()
+    nlparsing = prac.module('nl_parsing')
+    if nlparsing.cache is None:
+        parser.error('The parse cache is disabled in the PRAC configuration.')
+    if args.clear:
+        nlparsing.cache.clear()
+    sentences = [s for path in args.paths for s in read_sentences(path, args.recursive)]
+    if sentences:
+        nlparsing.parse_batch([nlparsing.preprocess(s) for s in sentences], workers=args.workers)
+    if args.stats:
+        for key, value in sorted(nlparsing.cache.stats().items()):
+            print('{}: {}'.format(key, value))
+
+
+if __name__ == '__main__':
+    main()
@@ -101,6 +101,8 @@ def main():
     if args.interactive:  # use the GUI
         from tkinter import Tk
         root = Tk()
+        # the GUI displays the visualizations of the inference steps
+        prac.render_pngs = True
         # in case we have natural-language parameters, parse them
         infer = PRACInference(prac, sentences)
         if len(sentences) > 0:
@@ -86,6 +86,8 @@ setup(
         'practell',
         'pracquery',
         'pracparse',
+        'pracparsecache',
+        'pracsimmatrix',
         'senses'
     ],
     package_dir={
@@ -136,6 +138,9 @@ setup(
         'console_scripts': [
             'pracquery=pracquery:main',
             'pracparse=pracparse:main',
+            'pracparsecache=pracparsecache:main',
+            'pracsimmatrix=pracsimmatrix:main',
+            'pracwnstore=prac.core.wnstore:main',
             'practell=practell:main',
             'pracsenses=senses:main',
             'pracxfold=pracxfold:main',